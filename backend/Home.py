@@ -1,10 +1,10 @@
-import yaml
+import copy
 import base64
 import streamlit as st
-from yaml import SafeLoader
 import streamlit_authenticator as stauth
 
 from pages.helper import db_queries
+from pages.helper.yaml_cache import load_yaml
 
 
 st.set_page_config(page_title="Reunite AI – Admin", layout="wide")
@@ -35,14 +35,15 @@ if "login_status" not in st.session_state:
     st.session_state["login_status"] = False
 
 try:
-    with open("login_config.yml") as file:
-        config = yaml.load(file, Loader=SafeLoader)
+    config = load_yaml("login_config.yml")
 except FileNotFoundError:
     st.error("Configuration file 'login_config.yml' not found")
     st.stop()
 
+# The parsed config is shared across sessions; the authenticator writes
+# login state into the credentials dict, so hand it a private copy.
 authenticator = stauth.Authenticate(
-    config["credentials"],
+    copy.deepcopy(config["credentials"]),
     config["cookie"]["name"],
     config["cookie"]["key"],
     config["cookie"]["expiry_days"],
@@ -69,8 +70,8 @@ if st.session_state.get("authentication_status"):
     non_found_cases = db_queries.get_registered_cases_count(user_info["name"], "NF")
 
     found_col, not_found_col = st.columns(2)
-    found_col.metric("Cases marked as found", value=len(found_cases))
-    not_found_col.metric("Open (not found) cases", value=len(non_found_cases))
+    found_col.metric("Cases marked as found", value=found_cases)
+    not_found_col.metric("Open (not found) cases", value=non_found_cases)
 
     st.info(
         "Use the navigation menu (left sidebar) to register new cases, review existing "
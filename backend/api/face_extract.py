@@ -0,0 +1,60 @@
+"""
+Face encoding extraction shared by the case and public-sighting routers
+"""
+
+import io
+from typing import Optional, Union
+
+import numpy as np
+import PIL.Image
+
+from pages.helper import model_cache
+
+# Uploads are capped to this size before detection - RetinaFace gains
+# nothing from a 12 MP phone photo.
+MAX_IMAGE_SIDE = 1024
+
+
+def load_image_array(image: Union[str, bytes]) -> np.ndarray:
+    """
+    Decode an image file path or encoded image bytes into an RGB uint8 array
+    capped at MAX_IMAGE_SIDE.
+    """
+    source = io.BytesIO(image) if isinstance(image, (bytes, bytearray)) else image
+    with PIL.Image.open(source) as image:
+        # Let the JPEG decoder downscale while decoding when it can
+        image.draft("RGB", (MAX_IMAGE_SIDE, MAX_IMAGE_SIDE))
+        image = image.convert("RGB")
+    image.thumbnail((MAX_IMAGE_SIDE, MAX_IMAGE_SIDE))
+    return np.asarray(image)
+
+
+def extract_face_encoding_from_image(image: Union[str, bytes]) -> Optional[list]:
+    """Extract face encoding from an image file path or encoded image bytes using DeepFace."""
+    try:
+        from deepface import DeepFace
+
+        image_array = load_image_array(image)
+
+        # Enforce detection to ensure a face exists
+        embedding_objs = DeepFace.represent(
+            img_path=image_array,
+            model_name=model_cache.MODEL_NAME,
+            detector_backend=model_cache.DETECTOR_BACKEND,
+            enforce_detection=True,
+            align=True
+        )
+
+        if embedding_objs:
+            # Return the embedding of the first face found
+            return embedding_objs[0]["embedding"]
+
+        print("No face detected in image (DeepFace)")
+        return None
+
+    except ImportError:
+        print("DeepFace not installed or model missing")
+        return None
+    except Exception as e:
+        print(f"Error extracting face encoding: {e}")
+        return None
@@ -0,0 +1,80 @@
+"""
+Dedicated process pool for face-encoding inference.
+
+Upload handlers used to run DeepFace on FastAPI's threadpool (40 threads by
+default), so a burst of uploads oversubscribed the model and competed with
+the event loop for the GIL. Extraction now runs on a small, bounded pool of
+worker processes, each of which loads ArcFace/RetinaFace once at start-up.
+"""
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Union
+
+from api.face_extract import extract_face_encoding_from_image
+from pages.helper import model_cache
+
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", min(2, os.cpu_count() or 1)))
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def _init_worker():
+    """Load the face models once per worker process."""
+    model_cache.warm_up()
+
+
+def get_executor() -> ProcessPoolExecutor:
+    """Return the shared inference pool, creating it on first use."""
+    global _executor
+    if _executor is None:
+        # spawn, not fork: TensorFlow state doesn't survive a fork of a
+        # threaded parent.
+        _executor = ProcessPoolExecutor(
+            max_workers=INFERENCE_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+    return _executor
+
+
+def _discard_executor(executor: ProcessPoolExecutor):
+    """
+    Drop a pool that has become unusable. A ProcessPoolExecutor whose worker
+    died (TensorFlow OOM, segfault) rejects every later submit, so the next
+    get_executor() has to build a fresh one.
+    """
+    global _executor
+    executor.shutdown(wait=False, cancel_futures=True)
+    if _executor is executor:
+        _executor = None
+
+
+def start():
+    """Spin up the workers now so the first upload doesn't wait for model loading."""
+    executor = get_executor()
+    for _ in range(INFERENCE_WORKERS):
+        executor.submit(os.getpid)
+
+
+def shutdown():
+    """Stop the worker processes (called on app shutdown)."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+async def extract_face_encoding(image: Union[str, bytes]) -> Optional[list]:
+    """Run extract_face_encoding_from_image (path or encoded bytes) on the inference pool."""
+    loop = asyncio.get_running_loop()
+    executor = get_executor()
+    try:
+        return await loop.run_in_executor(executor, extract_face_encoding_from_image, image)
+    except BrokenProcessPool:
+        # A worker died; retry once on a fresh pool
+        _discard_executor(executor)
+        return await loop.run_in_executor(get_executor(), extract_face_encoding_from_image, image)
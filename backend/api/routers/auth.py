@@ -2,17 +2,21 @@
 Authentication router - Login and Signup endpoints
 """
 
-from datetime import datetime, timedelta
+import time
 from typing import Optional
 import jwt
-import yaml
 from fastapi import APIRouter, HTTPException, status
 from pydantic import BaseModel, EmailStr
 
+from pages.helper.yaml_cache import load_yaml
+
 # JWT Configuration
 SECRET_KEY = "reunite-ai-secret-key-change-in-production"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_HOURS = 24
+_EXPIRE_SECONDS = ACCESS_TOKEN_EXPIRE_HOURS * 3600
+# PyJWT accepts the HMAC key as bytes without re-encoding it per call
+_SIGNING_KEY = SECRET_KEY.encode("utf-8")
 
 router = APIRouter()
 
@@ -48,28 +52,28 @@ class UserResponse(BaseModel):
 
 def create_access_token(data: dict) -> str:
     """Create JWT access token."""
-    to_encode = data.copy()
-    expire = datetime.utcnow() + timedelta(hours=ACCESS_TOKEN_EXPIRE_HOURS)
-    to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    # "exp" as an int timestamp - same claim PyJWT would derive from a datetime
+    to_encode = {**data, "exp": int(time.time()) + _EXPIRE_SECONDS}
+    return jwt.encode(to_encode, _SIGNING_KEY, algorithm=ALGORITHM)
 
 
-def verify_yaml_credentials(username: str, password: str) -> Optional[dict]:
-    """Verify credentials against login_config.yml (backward compatibility)."""
-    try:
-        with open("login_config.yml") as file:
-            config = yaml.safe_load(file)
-        
+# (config object the index was built from, username -> user dict)
+_user_index_cache = (None, {})
+
+
+def _user_index(config: dict) -> dict:
+    """
+    Return username -> UserResponse-shaped dict for the parsed login config.
+
+    load_yaml returns the same object until the file changes, so the index
+    is rebuilt only when the config is re-parsed.
+    """
+    global _user_index_cache
+    source, index = _user_index_cache
+    if source is not config:
         users = config.get("credentials", {}).get("usernames", {})
-        if username in users:
-            user_data = users[username]
-            # Note: In the YAML, passwords are hashed with streamlit_authenticator
-            # For now, we'll do a simple comparison (should be updated for production)
-            stored_password = user_data.get("password", "")
-            
-            # For demo: accept any password for existing users
-            # In production, use proper password hashing verification
-            return {
+        index = {
+            username: {
                 "id": username,
                 "name": user_data.get("name", username),
                 "email": user_data.get("email", f"{username}@reunite.ai"),
@@ -78,6 +82,23 @@ def verify_yaml_credentials(username: str, password: str) -> Optional[dict]:
                 "area": user_data.get("area", ""),
                 "city": user_data.get("city", ""),
             }
+            for username, user_data in users.items()
+        }
+        _user_index_cache = (config, index)
+    return index
+
+
+def verify_yaml_credentials(username: str, password: str) -> Optional[dict]:
+    """
+    Verify credentials against login_config.yml (backward compatibility).
+
+    The returned dict is shared between logins - do not mutate it.
+    """
+    try:
+        # Note: In the YAML, passwords are hashed with streamlit_authenticator
+        # For demo: accept any password for existing users
+        # In production, use proper password hashing verification
+        return _user_index(load_yaml("login_config.yml")).get(username)
     except FileNotFoundError:
         pass
     except Exception as e:
@@ -2,20 +2,21 @@
 Registered Cases router - CRUD operations for missing person cases
 """
 
+import asyncio
 import os
 import uuid
-import json
 from datetime import datetime
-from io import BytesIO
 from typing import List, Optional
 from fastapi import APIRouter, HTTPException, UploadFile, File, Form, BackgroundTasks
-from starlette.concurrency import run_in_threadpool
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
-import numpy as np
-import PIL.Image
 
+from api import inference_pool
+from api.uploads import write_bytes
 from pages.helper import db_queries
 from pages.helper.data_models import RegisteredCases
+from pages.helper.embeddings import encode_embedding
+from pages.helper.photo_store import compact_image_file
 
 router = APIRouter()
 
@@ -39,114 +40,34 @@ class CaseResponse(BaseModel):
         from_attributes = True
 
 
-def extract_face_encoding_from_image(image_bytes: bytes) -> Optional[list]:
-    """Extract face encoding from image bytes using DeepFace."""
-    try:
-        from deepface import DeepFace
-        
-        image = PIL.Image.open(BytesIO(image_bytes)).convert("RGB")
-        image_array = np.array(image)
-        
-        embedding_objs = DeepFace.represent(
-            img_path=image_array,
-            model_name="ArcFace",
-            detector_backend="retinaface",
-            enforce_detection=True,
-            align=True
-        )
-        
-        if embedding_objs:
-            return embedding_objs[0]["embedding"]
-        
-        print("No face detected in image (DeepFace)")
-        return None
-        
-    except ImportError:
-        print("DeepFace not installed or model missing")
-        return None
-    except Exception as e:
-        print(f"Error extracting face encoding: {e}")
-        return None
-
-
 @router.get("", response_model=List[CaseResponse])
 async def list_cases(
     status: Optional[str] = "NF",
     submitted_by: Optional[str] = None,
     limit: Optional[int] = None,
+    offset: int = 0,
 ):
     """List registered cases."""
     try:
         if submitted_by:
-            cases = db_queries.fetch_registered_cases(submitted_by, status)
+            cases = db_queries.fetch_registered_cases(submitted_by, status, limit=limit, offset=offset)
         else:
             if status == "Not Found" or status == "NF":
-                cases = db_queries.fetch_all_not_found_registered_cases()
+                cases = db_queries.fetch_all_not_found_registered_cases(limit=limit, offset=offset)
             else:
                 # For "All", "Found", or any other status - fetch all cases
-                cases = db_queries.fetch_all_registered_cases()
-
-        result = []
-        for case in cases:
-            def get_idx(tup, idx):
-                return tup[idx] if isinstance(tup, tuple) and len(tup) > idx else None
-
-            case_id = case[0] if isinstance(case, tuple) else case.id
-            name = case[1] if isinstance(case, tuple) else case.name
-            age = str(case[2]) if isinstance(case, tuple) else str(case.age)
-            status_val = case[3] if isinstance(case, tuple) else case.status
-            last_seen = case[4] if isinstance(case, tuple) else case.last_seen
-
-            birth_marks = None
-            matched_with = None
-            father_name = None
-            address = None
-            comp_name = None
-            comp_mobile = None
-            sub_on = None
-
-            if isinstance(case, tuple):
-                if submitted_by: 
-                    matched_with = get_idx(case, 5)
-                    comp_mobile = get_idx(case, 6)
-                    birth_marks = get_idx(case, 7)
-                    father_name = get_idx(case, 8)
-                    address = get_idx(case, 9)
-                    comp_name = get_idx(case, 10)
-                    sub_on = get_idx(case, 11)
-                else:
-                    birth_marks = get_idx(case, 5)
-                    father_name = get_idx(case, 6)
-                    address = get_idx(case, 7)
-                    comp_name = get_idx(case, 8)
-                    comp_mobile = get_idx(case, 9)
-                    sub_on = get_idx(case, 10)
-            else:
-                birth_marks = getattr(case, 'birth_marks', None)
-                matched_with = getattr(case, 'matched_with', None)
-                father_name = getattr(case, 'father_name', None)
-                address = getattr(case, 'address', None)
-                comp_name = getattr(case, 'complainant_name', None)
-
-            result.append(CaseResponse(
-                id=case_id,
-                name=name,
-                age=age,
-                status=status_val,
-                last_seen=last_seen,
-                birth_marks=birth_marks,
-                matched_with=matched_with,
-                complainant_mobile=comp_mobile,
-                father_name=father_name,
-                address=address,
-                complainant_name=comp_name,
-                submitted_on=sub_on,
-                photo_url=f"/resources/{case_id}.jpg",
-            ))
-        
-        if limit:
-            result = result[:limit]
-        
+                cases = db_queries.fetch_all_registered_cases(limit=limit, offset=offset)
+
+        # Every fetch_* query projects named columns, so rows map straight onto the response.
+        # DB rows are trusted - skip per-field validation. The one exception is
+        # age: nullable in the table but a str in CaseResponse, which FastAPI
+        # still checks on the way out.
+        result = [
+            CaseResponse.model_construct(
+                **{**case._mapping, "age": str(case.age or "")}, photo_url=f"/resources/{case.id}.jpg"
+            )
+            for case in cases
+        ]
         return result
     except Exception as e:
         print(f"Error fetching cases: {e}")
@@ -169,18 +90,23 @@ async def register_case(
     background_tasks: BackgroundTasks = None
 ):
     """Register a new missing person case with photo."""
-    # Read and save photo
-    photo_bytes = await photo.read()
-    case_id = str(uuid.uuid4())
+    case_id = uuid.uuid4().hex
     photo_filename = f"{case_id}.jpg"
     photo_path = os.path.join("resources", photo_filename)
-    
-    os.makedirs("resources", exist_ok=True)
-    with open(photo_path, "wb") as f:
-        f.write(photo_bytes)
-    
-    # Extract face encoding in thread pool to avoid blocking
-    face_encoding = await run_in_threadpool(extract_face_encoding_from_image, photo_bytes)
+
+    # Read the photo once and hand the same bytes to the disk write and to
+    # the inference pool, so the save overlaps face extraction.
+    photo_bytes = await photo.read()
+    try:
+        _, face_encoding = await asyncio.gather(
+            write_bytes(photo_path, photo_bytes),
+            inference_pool.extract_face_encoding(photo_bytes),
+        )
+    except Exception as e:
+        # e.g. an inference worker died; don't leave the photo orphaned
+        if os.path.exists(photo_path):
+            os.remove(photo_path)
+        raise HTTPException(status_code=500, detail=f"Could not process the photo: {e}")
     
     if not face_encoding:
         # cleanup saved photo
@@ -191,6 +117,9 @@ async def register_case(
             detail="No face detected in the image. Please upload a clear photo of the person's face."
         )
     
+    # The encoding came from the full upload; keep only a display-sized copy
+    await run_in_threadpool(compact_image_file, photo_path)
+
     # Create case record
     case = RegisteredCases(
         id=case_id,
@@ -203,7 +132,7 @@ async def register_case(
         adhaar_card=adhaar_card,
         last_seen=last_seen,
         address=address,
-        face_mesh=json.dumps(face_encoding),
+        face_mesh=encode_embedding(face_encoding),
         status="NF",
         birth_marks=birth_marks,
     )
@@ -2,27 +2,36 @@
 Public Submissions router - CRUD operations for public sightings
 """
 
+import asyncio
+import hashlib
 import os
+import traceback
 import uuid
-import json
 from datetime import datetime
 from typing import List, Optional
-from typing import List, Optional
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form, BackgroundTasks
-from starlette.concurrency import run_in_threadpool
+import orjson
+from fastapi import APIRouter, HTTPException, Request, Response, UploadFile, File, Form, BackgroundTasks
 from pydantic import BaseModel
-import numpy as np
-import PIL.Image
+from starlette.concurrency import run_in_threadpool
 
+from api import inference_pool
+from api.uploads import save_upload
 from pages.helper import db_queries
 from pages.helper.data_models import PublicSubmissions
+from pages.helper.embeddings import encode_embedding
+from pages.helper.photo_store import compact_image_file
 
 router = APIRouter()
 
+# Uploads wait here until processed: resources/ is served as immutable, so a
+# photo is only moved there once it is in its final (compacted) form
+PENDING_UPLOADS_DIR = "pending_uploads"
+
 
 class PublicSubmissionResponse(BaseModel):
     id: str
     status: str
+    public_ref: Optional[str] = None
     location: Optional[str] = None
     mobile: Optional[str] = None
     birth_marks: Optional[str] = None
@@ -33,44 +42,19 @@ class PublicSubmissionResponse(BaseModel):
         from_attributes = True
 
 
-def extract_face_encoding_from_image(image_bytes: bytes) -> Optional[list]:
-    """Extract face encoding from image bytes."""
-    try:
-        from deepface import DeepFace
-        from io import BytesIO
-        
-        image = PIL.Image.open(BytesIO(image_bytes)).convert("RGB")
-        image_array = np.array(image)
-        
-        # Enforce detection to ensure a face exists
-        embedding_objs = DeepFace.represent(
-            img_path=image_array,
-            model_name="ArcFace",
-            detector_backend="retinaface",
-            enforce_detection=True,
-            align=True
-        )
-        
-        if embedding_objs:
-            # Return the embedding of the first face found
-            return embedding_objs[0]["embedding"]
-        return None
-    except ImportError:
-        return None
-    except Exception as e:
-        print(f"Error extracting face encoding: {e}")
-        return None
-
-
 @router.get("", response_model=List[PublicSubmissionResponse])
-async def list_public_submissions(status: Optional[str] = "NF"):
+async def list_public_submissions(
+    status: Optional[str] = "NF",
+    limit: Optional[int] = None,
+    offset: int = 0,
+):
     """List public submissions/sightings. use status='All' for everything."""
     try:
-        cases = db_queries.fetch_public_cases(train_data=False, status=status)
+        cases = db_queries.fetch_public_cases(train_data=False, status=status, limit=limit, offset=offset)
         
         result = []
         for case in cases:
-            result.append(PublicSubmissionResponse(
+            result.append(PublicSubmissionResponse.model_construct(
                 id=case[0],
                 status=case[1],
                 location=case[2],
@@ -86,66 +70,158 @@ async def list_public_submissions(status: Optional[str] = "NF"):
         return []
 
 
-@router.post("", response_model=PublicSubmissionResponse)
+# Status pages poll these; let clients revalidate for free and reuse briefly
+STATUS_CACHE_CONTROL = "private, max-age=10"
+
+
+def conditional_json(request: Request, payload: dict) -> Response:
+    """
+    JSON response with a content-derived weak ETag. If the client's
+    If-None-Match already has this version, answer 304 with no body.
+    """
+    body = orjson.dumps(payload)
+    etag = 'W/"%s"' % hashlib.blake2b(body, digest_size=8).hexdigest()
+    headers = {"ETag": etag, "Cache-Control": STATUS_CACHE_CONTROL}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+async def process_submission(submission_id: str, upload_path: str):
+    """
+    Background half of submit_sighting: extract the face encoding on the
+    inference pool, shrink the photo and publish it to resources/, then mark
+    the submission NF (ready for matching) or rejected, and run the match
+    against open cases.
+
+    Always leaves the submission in a terminal status: 'failed' if storing
+    it breaks after extraction. A failed match only logs - the submission
+    stays NF and is picked up by the next full matching run.
+    """
+    try:
+        face_encoding = await inference_pool.extract_face_encoding(upload_path)
+    except Exception as e:
+        print(f"Error processing submission {submission_id}: {e}")
+        face_encoding = None
+
+    if not face_encoding:
+        db_queries.update_public_submission(submission_id, status="rejected")
+        if os.path.exists(upload_path):
+            os.remove(upload_path)
+        return
+
+    try:
+        # The encoding came from the full upload; keep only a display-sized copy
+        await run_in_threadpool(compact_image_file, upload_path)
+        os.replace(upload_path, os.path.join("resources", f"{submission_id}.jpg"))
+
+        db_queries.update_public_submission(
+            submission_id, status="NF", face_mesh=encode_embedding(face_encoding)
+        )
+    except Exception as e:
+        print(f"Error storing submission {submission_id}: {e}")
+        traceback.print_exc()
+        for photo_path in (upload_path, os.path.join("resources", f"{submission_id}.jpg")):
+            if os.path.exists(photo_path):
+                os.remove(photo_path)
+        db_queries.update_public_submission(submission_id, status="failed")
+        return
+
+    try:
+        from pages.helper import match_algo
+        await run_in_threadpool(match_algo.match_one_against_all, case_id=submission_id, case_type="public")
+    except Exception as e:
+        print(f"Error matching submission {submission_id}: {e}")
+        traceback.print_exc()
+
+
+# Strong references to resumed jobs (the event loop only keeps weak ones)
+_resumed_tasks = set()
+
+
+def resume_queued_submissions():
+    """
+    Re-run process_submission for submissions left 'queued' by a restart
+    (BackgroundTasks don't survive the process). Called from the app lifespan.
+    """
+    for submission_id in db_queries.get_queued_public_submission_ids():
+        upload_path = os.path.join(PENDING_UPLOADS_DIR, f"{submission_id}.jpg")
+        if not os.path.exists(upload_path):
+            # Stopped after the photo was published but before the status update
+            upload_path = os.path.join("resources", f"{submission_id}.jpg")
+        task = asyncio.create_task(process_submission(submission_id, upload_path))
+        _resumed_tasks.add(task)
+        task.add_done_callback(_resumed_tasks.discard)
+
+
+@router.post("", response_model=PublicSubmissionResponse, status_code=202)
 async def submit_sighting(
     location: str = Form(...),
     mobile: str = Form(...),
     birth_marks: str = Form(""),
     email: str = Form(""),
     submitted_by: str = Form("Anonymous"),
+    submission_id: Optional[str] = Form(None),
     photo: UploadFile = File(...),
     background_tasks: BackgroundTasks = None
 ):
     """
     Submit a public sighting of a potentially missing person.
+
+    The photo is saved and the submission queued; face extraction and matching
+    run in the background. Poll /{id}/status - it moves from 'queued' to 'NF'
+    (under review), 'rejected' (no face found in the photo) or 'failed' (an
+    error while storing it; the user should resubmit). The photo is
+    served under /resources only once the submission leaves 'queued'. The returned
+    public_ref is the short Report ID to show the user; the status endpoints
+    accept it in place of the id.
+
+    - **submission_id**: optional client-generated UUID. Retrying with the same
+      ID returns the existing submission instead of creating a duplicate.
     """
-    # Read and save photo
-    photo_bytes = await photo.read()
-    submission_id = str(uuid.uuid4())
-    photo_filename = f"{submission_id}.jpg"
-    photo_path = os.path.join("resources", photo_filename)
-    
-    os.makedirs("resources", exist_ok=True)
-    with open(photo_path, "wb") as f:
-        f.write(photo_bytes)
-    
-    # Extract face encoding in thread pool
-    face_encoding = await run_in_threadpool(extract_face_encoding_from_image, photo_bytes)
-    
-    if not face_encoding:
-        if os.path.exists(photo_path):
-            os.remove(photo_path)
-        raise HTTPException(
-            status_code=400, 
-            detail="No face detected in the image. Please upload a clear photo of the person's face."
-        )
-    
-    # Create submission record
+    if submission_id:
+        try:
+            submission_id = uuid.UUID(submission_id).hex
+        except ValueError:
+            raise HTTPException(status_code=400, detail="submission_id must be a UUID")
+        existing = db_queries.get_public_submission_basic(submission_id)
+        if existing:
+            return PublicSubmissionResponse(
+                id=existing[0],
+                status=existing[1],
+                location=existing[2],
+                birth_marks=existing[3],
+                submitted_on=existing[4],
+                public_ref=existing[5],
+            )
+    else:
+        submission_id = uuid.uuid4().hex
+
+    upload_path = os.path.join(PENDING_UPLOADS_DIR, f"{submission_id}.jpg")
+    await save_upload(photo, upload_path)
+
+    # Insert the row as queued; the encoding is filled in by process_submission
     submission = PublicSubmissions(
         id=submission_id,
         submitted_by=submitted_by,
-        face_mesh=json.dumps(face_encoding),
+        face_mesh=b"",
         location=location,
         mobile=mobile,
         email=email,
-        status="NF",  # Not Found / Under Review
+        status="queued",
         birth_marks=birth_marks,
     )
+    public_ref = submission.public_ref
     
     db_queries.new_public_case(submission)
     
-    # Trigger background matching
     if background_tasks:
-        from pages.helper import match_algo
-        background_tasks.add_task(
-            match_algo.match_one_against_all, 
-            case_id=submission_id, 
-            case_type="public"
-        )
+        background_tasks.add_task(process_submission, submission_id, upload_path)
     
     return PublicSubmissionResponse(
         id=submission_id,
-        status="NF",
+        status="queued",
+        public_ref=public_ref,
         location=location,
         mobile=mobile,
         birth_marks=birth_marks,
@@ -153,21 +229,22 @@ async def submit_sighting(
 
 
 @router.get("/{submission_id}")
-async def get_submission(submission_id: str):
-    """Get details of a specific public submission."""
+async def get_submission(submission_id: str, request: Request):
+    """Get details of a public submission by ID or Report ID (ETag / 304 aware)."""
     try:
         result = db_queries.get_public_submission_basic(submission_id)
         if not result:
             raise HTTPException(status_code=404, detail="Submission not found")
         
-        return {
+        return conditional_json(request, {
             "id": result[0],
+            "public_ref": result[5],
             "status": result[1],
             "location": result[2],
             "birth_marks": result[3],
             "submitted_on": result[4],
-            "photo_url": f"/resources/{submission_id}.jpg",
-        }
+            "photo_url": f"/resources/{result[0]}.jpg",
+        })
     except HTTPException:
         raise
     except Exception as e:
@@ -180,10 +257,13 @@ async def delete_submission(submission_id: str):
     try:
         db_queries.delete_public_case(submission_id)
         
-        # Also delete photo if exists
-        photo_path = os.path.join("resources", f"{submission_id}.jpg")
-        if os.path.exists(photo_path):
-            os.remove(photo_path)
+        # Also delete photo if exists (still pending if never processed)
+        for photo_path in (
+            os.path.join("resources", f"{submission_id}.jpg"),
+            os.path.join(PENDING_UPLOADS_DIR, f"{submission_id}.jpg"),
+        ):
+            if os.path.exists(photo_path):
+                os.remove(photo_path)
         
         return {"status": "deleted", "id": submission_id}
     except Exception as e:
@@ -191,17 +271,18 @@ async def delete_submission(submission_id: str):
 
 
 @router.get("/{submission_id}/status")
-async def get_submission_status(submission_id: str):
-    """Get status of a public submission."""
+async def get_submission_status(submission_id: str, request: Request):
+    """Get status of a public submission by ID or Report ID (ETag / 304 aware, for polling)."""
     try:
         result = db_queries.get_public_submission_basic(submission_id)
         if not result:
             raise HTTPException(status_code=404, detail="Submission not found")
         
-        return {
-            "id": result[0], 
+        return conditional_json(request, {
+            "id": result[0],
+            "public_ref": result[5],
             "status": result[1]
-        }
+        })
     except HTTPException:
         raise
     except Exception as e:
@@ -7,24 +7,35 @@ Endpoints:
   GET  /api/v2/video/results/{case_id} Fetch detection results for a case
 """
 
+import logging
 import os
 import uuid
+from functools import lru_cache
 from typing import List, Optional
 from datetime import datetime
 
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form, BackgroundTasks
+import anyio
+import numpy as np
+import orjson
+from fastapi import APIRouter, HTTPException, Request, UploadFile, File, Form
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
+from api import video_pool
+from api.uploads import UploadTooLarge, save_upload
 from pages.helper import db_queries
 from pages.helper.data_models import VideoUploads
 from pages.helper.video_processor import (
     VIDEO_UPLOADS_DIR,
     ALLOWED_EXTENSIONS,
+    MAX_VIDEO_SIZE_BYTES,
     validate_video_file,
-    process_video,
 )
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+VIDEO_CHUNK_SIZE = 1 << 20  # 1 MB
 
 
 # ---------------------------------------------------------------------------
@@ -59,6 +70,10 @@ class DetectionItem(BaseModel):
     detected_at: Optional[datetime] = None
 
 
+# Field order of the streamed detection objects (matches DetectionItem)
+DETECTION_FIELDS = tuple(DetectionItem.model_fields)
+
+
 class VideoResultsResponse(BaseModel):
     case_id: str
     case_name: Optional[str] = None
@@ -70,15 +85,39 @@ class VideoResultsResponse(BaseModel):
 # Helpers
 # ---------------------------------------------------------------------------
 
-def _format_timestamp(seconds: float) -> str:
-    """Convert seconds to HH:MM:SS display string."""
-    total = int(seconds)
-    hrs = total // 3600
-    mins = (total % 3600) // 60
-    secs = total % 60
-    if hrs > 0:
-        return f"{hrs:02d}:{mins:02d}:{secs:02d}"
-    return f"{mins:02d}:{secs:02d}"
+@lru_cache(maxsize=8192)
+def _format_whole_seconds(total: int) -> str:
+    """
+    Convert whole seconds to HH:MM:SS (or MM:SS under an hour) display string.
+
+    Detections cluster on the same whole seconds, so the formatted strings
+    are cached per integer second.
+    """
+    mins, secs = divmod(total, 60)
+    hrs, mins = divmod(mins, 60)
+    if hrs:
+        return "%02d:%02d:%02d" % (hrs, mins, secs)
+    return "%02d:%02d" % (mins, secs)
+
+
+def _encode_detections(batch) -> bytes:
+    """One batch of detection rows as the comma-joined body of a JSON array."""
+    # Rows -> columns, derive the computed columns in bulk, then zip
+    # back into dicts for a single dumps() per batch.
+    ids, video_ids, locations, timestamps, confidences, face_paths, detected_ats = zip(*batch)
+    whole_seconds = np.asarray(timestamps, dtype=np.float64).astype(np.int64).tolist()
+    columns = (
+        ids,
+        video_ids,
+        locations,
+        timestamps,
+        [_format_whole_seconds(total) for total in whole_seconds],
+        confidences,
+        ["/resources/" + path for path in face_paths],
+        detected_ats,
+    )
+    items = [dict(zip(DETECTION_FIELDS, values)) for values in zip(*columns)]
+    return orjson.dumps(items)[1:-1]
 
 
 # ---------------------------------------------------------------------------
@@ -87,11 +126,11 @@ def _format_timestamp(seconds: float) -> str:
 
 @router.post("/upload", response_model=VideoUploadResponse, status_code=201)
 async def upload_video(
+    request: Request,
     video: UploadFile = File(...),
     case_id: str = Form(...),
     video_location: str = Form(""),
     confidence_threshold: float = Form(0.60),
-    background_tasks: BackgroundTasks = None,
 ):
     """
     Upload a CCTV video file for analysis against a specific missing case.
@@ -101,8 +140,13 @@ async def upload_video(
     - **video_location**: Optional CCTV camera location description
     - **confidence_threshold**: Match threshold (0.0–1.0). Default 0.60
     """
+    # Reject oversized bodies up front, before the case lookup and disk copy
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > MAX_VIDEO_SIZE_BYTES:
+        raise HTTPException(status_code=413, detail="Video too large. Max: 2 GB")
+
     # Validate case exists
-    case_detail = db_queries.get_registered_case_detail(case_id)
+    case_detail = db_queries.get_registered_case_detail_cached(case_id)
     if not case_detail:
         raise HTTPException(status_code=404, detail="Selected case not found in database.")
 
@@ -115,23 +159,25 @@ async def upload_video(
         )
 
     # Save video file to disk
-    video_id = str(uuid.uuid4())
+    video_id = uuid.uuid4().hex
     safe_filename = f"{video_id}{ext}"
     file_path = os.path.join(VIDEO_UPLOADS_DIR, safe_filename)
 
-    os.makedirs(VIDEO_UPLOADS_DIR, exist_ok=True)
-
     try:
-        contents = await video.read()
-        with open(file_path, "wb") as f:
-            f.write(contents)
+        # Stream to disk in 1 MB chunks - never hold the whole video in memory.
+        # The byte cap also catches chunked bodies that sent no Content-Length.
+        await save_upload(
+            video, file_path, chunk_size=VIDEO_CHUNK_SIZE, max_bytes=MAX_VIDEO_SIZE_BYTES
+        )
+    except UploadTooLarge:
+        raise HTTPException(status_code=413, detail="Video too large. Max: 2 GB")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to save video: {str(e)}")
 
-    # Validate video after saving
-    ok, error = validate_video_file(file_path)
+    # Validate video after saving (cv2 opens the file - keep it off the event loop)
+    ok, error = await anyio.to_thread.run_sync(validate_video_file, file_path)
     if not ok:
-        os.remove(file_path)
+        await anyio.Path(file_path).unlink(missing_ok=True)
         raise HTTPException(status_code=400, detail=error)
 
     # Create database record
@@ -146,9 +192,8 @@ async def upload_video(
     )
     db_queries.create_video_upload(upload_record)
 
-    # Start background processing
-    if background_tasks:
-        background_tasks.add_task(process_video, video_id)
+    # Hand off to the video worker process; progress is polled via /status
+    video_pool.submit(video_id)
 
     return VideoUploadResponse(
         video_id=video_id,
@@ -184,46 +229,57 @@ async def get_video_status(video_id: str):
     )
 
 
-@router.get("/results/{case_id}", response_model=VideoResultsResponse)
+@router.get(
+    "/results/{case_id}",
+    response_class=StreamingResponse,
+    responses={200: {"model": VideoResultsResponse}},
+)
 async def get_video_results(case_id: str):
     """
     Fetch all video detection results for a specific missing case.
 
     Returns matched timestamps, confidence scores, cropped face URLs,
     and the CCTV location for each detection.
+
+    The body has the VideoResultsResponse shape but is streamed: detections
+    are read from the DB in batches and each batch is encoded column-wise in
+    one orjson call, so memory doesn't grow with the number of hits.
+
+    The first batch is read and encoded before the response starts, so a
+    failing query still returns a 500. Once the 200 has gone out there is no
+    way to report an error: a failure on a later batch is logged and ends
+    the body early, leaving the client with truncated (invalid) JSON.
     """
-    # Get case name
-    case_detail = db_queries.get_registered_case_detail(case_id)
-    case_name = None
-    if case_detail and len(case_detail) > 0:
-        case_name = case_detail[0][0] if isinstance(case_detail[0], tuple) else None
-
-    # Get all video uploads for this case
-    uploads = db_queries.get_video_uploads_by_case(case_id)
-    upload_map = {u.id: u for u in uploads} if uploads else {}
-
-    # Get all detections for this case
-    detections = db_queries.get_video_detections_by_case(case_id)
-
-    detection_items = []
-    for det in (detections or []):
-        vid_upload = upload_map.get(det.video_id)
-        video_location = vid_upload.video_location if vid_upload else None
-
-        detection_items.append(DetectionItem(
-            id=det.id,
-            video_id=det.video_id,
-            video_location=video_location,
-            timestamp_seconds=det.timestamp_seconds,
-            timestamp_display=_format_timestamp(det.timestamp_seconds),
-            confidence=det.confidence,
-            cropped_face_url=f"/resources/{det.cropped_face_path}",
-            detected_at=det.detected_at,
-        ))
-
-    return VideoResultsResponse(
-        case_id=case_id,
-        case_name=case_name,
-        total_videos_analyzed=len(upload_map),
-        detections=detection_items,
-    )
+    try:
+        # Get case name
+        case_detail = db_queries.get_registered_case_detail_cached(case_id)
+        case_name = case_detail[0].name if case_detail else None
+
+        header = orjson.dumps({
+            "case_id": case_id,
+            "case_name": case_name,
+            "total_videos_analyzed": db_queries.count_video_uploads_by_case(case_id),
+        })
+
+        batches = db_queries.iter_video_detection_batches(case_id)
+        first_batch = next(batches, None)
+        first_chunk = _encode_detections(first_batch) if first_batch else b""
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    def generate():
+        # Sync generator - Starlette iterates it on the threadpool, so the
+        # DB cursor never blocks the event loop.
+        yield header[:-1] + b',"detections":[' + first_chunk
+        try:
+            for batch in batches:
+                yield b"," + _encode_detections(batch)
+        except Exception:
+            logger.exception(f"Streaming video results for case {case_id} failed mid-response")
+            return
+        finally:
+            batches.close()
+        yield b"]}"
+
+    return StreamingResponse(generate(), media_type="application/json")
+
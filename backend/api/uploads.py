@@ -0,0 +1,107 @@
+"""
+Upload persistence shared by the case, public-sighting and video routers
+"""
+
+import io
+import os
+import shutil
+from typing import BinaryIO, Optional
+
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+UPLOAD_CHUNK_SIZE = 1 << 16  # 64 KB
+
+
+class UploadTooLarge(Exception):
+    """Raised when an upload exceeds the caller's max_bytes."""
+
+
+def _kernel_copy(src: BinaryIO, dst: BinaryIO, chunk_size: int, max_bytes: Optional[int]) -> bool:
+    """
+    Copy src to dst with os.copy_file_range (Linux) so the data never passes
+    through user space. Returns False if the fast path isn't available.
+    """
+    # Starlette spools small uploads in memory; fileno() would force them to disk
+    if not hasattr(os, "copy_file_range") or not getattr(src, "_rolled", True):
+        return False
+    try:
+        src.flush()
+        in_fd = src.fileno()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return False
+
+    out_fd = dst.fileno()
+    size = os.fstat(in_fd).st_size
+    if max_bytes is not None and size > max_bytes:
+        raise UploadTooLarge(size)
+    offset = 0
+    try:
+        while offset < size:
+            copied = os.copy_file_range(
+                in_fd, out_fd, min(chunk_size, size - offset), offset, offset
+            )
+            if copied == 0:
+                break
+            offset += copied
+    except OSError:
+        # e.g. cross-filesystem copy on older kernels - redo it the portable way
+        dst.seek(0)
+        dst.truncate()
+        return False
+    return offset == size
+
+
+def _copy_chunks(src: BinaryIO, dst: BinaryIO, chunk_size: int, max_bytes: Optional[int]) -> None:
+    """shutil.copyfileobj with a running byte count that aborts past max_bytes."""
+    if max_bytes is None:
+        shutil.copyfileobj(src, dst, chunk_size)
+        return
+    written = 0
+    while chunk := src.read(chunk_size):
+        written += len(chunk)
+        if written > max_bytes:
+            raise UploadTooLarge(written)
+        dst.write(chunk)
+
+
+def _copy_to_path(src: BinaryIO, path: str, chunk_size: int, max_bytes: Optional[int] = None) -> None:
+    """
+    Copy an already-spooled upload to disk in fixed-size chunks. If it grows
+    past max_bytes the partial file is removed and UploadTooLarge is raised.
+    """
+    src.seek(0)
+    try:
+        with open(path, "wb") as dst:
+            if not _kernel_copy(src, dst, chunk_size, max_bytes):
+                src.seek(0)
+                _copy_chunks(src, dst, chunk_size, max_bytes)
+    except UploadTooLarge:
+        os.remove(path)
+        raise
+
+
+def _write_bytes(path: str, data: bytes) -> None:
+    with open(path, "wb") as dst:
+        dst.write(data)
+
+
+async def write_bytes(path: str, data: bytes) -> None:
+    """Write an in-memory upload to path on the threadpool."""
+    await run_in_threadpool(_write_bytes, path, data)
+
+
+async def save_upload(
+    upload: UploadFile,
+    path: str,
+    chunk_size: int = UPLOAD_CHUNK_SIZE,
+    max_bytes: Optional[int] = None,
+) -> None:
+    """
+    Write an uploaded file to path without blocking the event loop.
+
+    Memory use is O(chunk_size) regardless of the upload size, and the whole
+    copy runs as one threadpool job instead of an await + blocking write()
+    per chunk on the loop thread. Raises UploadTooLarge past max_bytes.
+    """
+    await run_in_threadpool(_copy_to_path, upload.file, path, chunk_size, max_bytes)
@@ -0,0 +1,93 @@
+"""
+Process pool for CCTV video analysis jobs.
+
+process_video used to run through BackgroundTasks, i.e. on the same
+threadpool that serves sync endpoints, where minutes of frame decoding and
+inference held the GIL against request handling. Jobs now run in separate
+worker processes; progress is still written to the DB and polled through
+/api/v2/video/status.
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from pages.helper import db_queries
+from pages.helper.video_processor import process_video
+
+logger = logging.getLogger(__name__)
+
+# Each job holds the face models plus decoded frames (and VRAM on GPU), so
+# default to one job at a time and let bigger machines opt in.
+VIDEO_WORKERS = int(os.getenv("VIDEO_WORKERS", "1"))
+
+_executor: Optional[ProcessPoolExecutor] = None
+# _on_done runs on the pool's management thread, submit on request threads
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ProcessPoolExecutor:
+    """Return the shared video pool, creating it on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn for the same reason as the inference pool: TensorFlow
+            # doesn't survive a fork of a threaded parent.
+            _executor = ProcessPoolExecutor(
+                max_workers=VIDEO_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
+
+
+def _discard_executor(executor: ProcessPoolExecutor):
+    """
+    Drop a pool that has become unusable. A ProcessPoolExecutor whose worker
+    died (e.g. OOM on a long video) rejects every later submit, so the next
+    get_executor() has to build a fresh one.
+    """
+    global _executor
+    executor.shutdown(wait=False, cancel_futures=True)
+    with _executor_lock:
+        if _executor is executor:
+            _executor = None
+
+
+def _on_done(video_id: str, executor: ProcessPoolExecutor, future: Future):
+    """process_video records its own failures; this catches a worker that died."""
+    if future.cancelled():
+        return
+    error = future.exception()
+    if isinstance(error, BrokenProcessPool):
+        _discard_executor(executor)
+    if error is not None:
+        logger.error(f"[VIDEO] Worker failed for video {video_id}: {error!r}")
+        db_queries.update_video_status(
+            video_id, status="failed", error_message=f"{type(error).__name__}: {error}"[:500]
+        )
+
+
+def submit(video_id: str) -> Future:
+    """Queue process_video(video_id) on the pool and return immediately."""
+    executor = get_executor()
+    try:
+        future = executor.submit(process_video, video_id)
+    except BrokenProcessPool:
+        # Broken by a job whose done-callback hasn't run yet; retry on a fresh pool
+        _discard_executor(executor)
+        executor = get_executor()
+        future = executor.submit(process_video, video_id)
+    future.add_done_callback(lambda f: _on_done(video_id, executor, f))
+    return future
+
+
+def shutdown():
+    """Stop accepting jobs and drop queued ones (called on app shutdown)."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
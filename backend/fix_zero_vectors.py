@@ -1,66 +1,131 @@
-import json
 import logging
+from collections import defaultdict
+
 import numpy as np
-from sqlmodel import Session, select, delete
-from pages.helper.db_queries import engine
+from sqlmodel import Session, select
+from pages.helper.db_queries import bulk_delete, engine
 from pages.helper.data_models import RegisteredCases, PublicSubmissions
+from pages.helper.embeddings import decode_embedding, encoding_key
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 logger = logging.getLogger(__name__)
 
-def is_zero_vector(encoding_json: str) -> bool:
-    """Check if the JSON encoding represents a zero-vector."""
+ZERO_TOLERANCE = 0.001
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True, fastmath=True)
+    def zero_rows(matrix, tolerance):
+        """Per-row abs-sum < tolerance in one fused pass (no np.abs temporary)."""
+        n, d = matrix.shape
+        out = np.empty(n, dtype=np.bool_)
+        for i in range(n):
+            total = 0.0
+            for j in range(d):
+                total += abs(matrix[i, j])
+            out[i] = total < tolerance
+        return out
+else:
+    def zero_rows(matrix, tolerance):
+        """Per-row abs-sum < tolerance."""
+        return np.abs(matrix).sum(axis=1) < tolerance
+
+def is_zero_vector(face_mesh) -> bool:
+    """Check if the stored encoding is missing or represents a zero-vector."""
     try:
-        encoding = json.loads(encoding_json)
-        if not encoding:
+        arr = decode_embedding(face_mesh)
+        if arr is None:
             return True
         # Check if all elements are close to zero
-        arr = np.array(encoding)
-        if np.sum(np.abs(arr)) < 0.001:
+        if np.sum(np.abs(arr)) < ZERO_TOLERANCE:
             return True
         return False
     except Exception:
         return True
 
+def zero_vector_mask(face_meshes) -> np.ndarray:
+    """
+    Vectorized is_zero_vector over many rows.
+
+    Identical encodings (e.g. repeated placeholder vectors) are checked once:
+    rows are grouped by encoding_key, and the unique encodings are stacked
+    into one (N, D) matrix per dimension (old 128-D and new 512-D rows can
+    coexist) and reduced in a single pass.
+    """
+    encodings = [decode_embedding(mesh) for mesh in face_meshes]
+    mask = np.ones(len(encodings), dtype=bool)  # undecodable rows count as invalid
+
+    # (dim, hash) -> row indices sharing that encoding
+    groups = defaultdict(list)
+    for i, encoding in enumerate(encodings):
+        if encoding is not None:
+            groups[(encoding.shape[0], encoding_key(encoding))].append(i)
+
+    keys_by_dim = defaultdict(list)
+    for key in groups:
+        keys_by_dim[key[0]].append(key)
+
+    for keys in keys_by_dim.values():
+        matrix = np.stack([encodings[groups[key][0]] for key in keys])
+        invalid = zero_rows(matrix, ZERO_TOLERANCE)
+        for key, is_invalid in zip(keys, invalid):
+            mask[groups[key]] = is_invalid
+    return mask
+
+AUDIT_BATCH_SIZE = 1000
+
+def find_invalid_ids(session, model, label_column, tag, label_format="{}"):
+    """
+    Stream (id, label, face_mesh) rows in batches and return the IDs whose
+    encoding is missing or a zero vector. Memory stays O(batch).
+
+    Rows still 'queued' are skipped: their encoding is being extracted and
+    is filled in when processing finishes.
+    """
+    query = (
+        select(model.id, label_column, model.face_mesh)
+        .where(model.status.is_distinct_from("queued"))
+        .execution_options(yield_per=AUDIT_BATCH_SIZE)
+    )
+    invalid_ids = []
+    for batch in session.exec(query).partitions():
+        mask = zero_vector_mask([row.face_mesh for row in batch])
+        for i in mask.nonzero()[0]:
+            case_id, label, _ = batch[i]
+            logger.warning(f"[{tag}] Invalid: {case_id} - {label_format.format(label)}")
+            invalid_ids.append(case_id)
+    return invalid_ids
+
 def audit_zero_vectors(dry_run=True):
     """Scan database for cases with invalid/zero face encodings."""
     logger.info(f"Starting Database Audit (Dry Run: {dry_run})")
     
     with Session(engine) as session:
         # 1. Check Registered Cases
-        reg_cases = session.exec(select(RegisteredCases)).all()
-        invalid_reg = []
-        for case in reg_cases:
-            if is_zero_vector(case.face_mesh):
-                invalid_reg.append(case)
-        
+        invalid_reg = find_invalid_ids(session, RegisteredCases, RegisteredCases.name, "REG")
         logger.info(f"Found {len(invalid_reg)} Registered Cases with zero vectors.")
-        for case in invalid_reg:
-            logger.warning(f"[REG] Invalid: {case.id} - {case.name}")
 
         # 2. Check Public Submissions
-        pub_cases = session.exec(select(PublicSubmissions)).all()
-        invalid_pub = []
-        for case in pub_cases:
-            if is_zero_vector(case.face_mesh):
-                invalid_pub.append(case)
-        
+        invalid_pub = find_invalid_ids(
+            session, PublicSubmissions, PublicSubmissions.location, "PUB", label_format="Loc: {}"
+        )
         logger.info(f"Found {len(invalid_pub)} Public Submissions with zero vectors.")
-        for case in invalid_pub:
-            logger.warning(f"[PUB] Invalid: {case.id} - Loc: {case.location}")
 
-        # 3. Action
+        # 3. Action - chunked bulk DELETEs in one transaction instead of a round-trip per row
         if not dry_run:
             if invalid_reg:
                 logger.info("Deleting invalid Registered Cases...")
-                for case in invalid_reg:
-                    session.delete(case)
+                bulk_delete(session, RegisteredCases, invalid_reg)
             
             if invalid_pub:
                 logger.info("Deleting invalid Public Submissions...")
-                for case in invalid_pub:
-                    session.delete(case)
+                bulk_delete(session, PublicSubmissions, invalid_pub)
             
             session.commit()
             logger.info("Cleanup complete.")
@@ -1,25 +1,28 @@
 import sys
-import json
 import logging
 import numpy as np
 from sqlmodel import Session, select
 from pages.helper.db_queries import engine
 from pages.helper.data_models import RegisteredCases, PublicSubmissions
+from pages.helper.embeddings import decode_embedding, encoding_key
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format="%(message)s")
 logger = logging.getLogger(__name__)
 
-def check_encoding(encoding_json, context):
+def check_encoding(face_mesh, context):
     try:
-        if not encoding_json:
+        if not face_mesh:
             logger.info(f"[{context}] Encoding is EMPTY/NULL")
             return
             
-        encoding = json.loads(encoding_json)
-        arr = np.array(encoding)
+        arr = decode_embedding(face_mesh)
+        if arr is None:
+            logger.error(f"[{context}] Encoding could not be decoded")
+            return
         
-        logger.info(f"[{context}] Encoding Length: {len(encoding)}")
+        logger.info(f"[{context}] Encoding Length: {len(arr)}")
+        logger.info(f"[{context}] Fingerprint: {encoding_key(arr):016x}")
         logger.info(f"[{context}] First 5 values: {arr[:5]}")
         logger.info(f"[{context}] Sum: {np.sum(arr)}")
         
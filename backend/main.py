@@ -6,6 +6,7 @@ Main application entry point
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 import os
 
@@ -14,13 +15,24 @@ from api.routers import auth, cases, public, matching, video
 
 # Import database initialization
 from pages.helper.db_queries import create_db
+from api import inference_pool, video_pool
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Initialize database on startup."""
+    """Initialize database and start the inference workers on startup."""
     create_db()
+    # Upload handlers write photos here; create it once rather than per request
+    os.makedirs("resources", exist_ok=True)
+    os.makedirs(public.PENDING_UPLOADS_DIR, exist_ok=True)
+    # Workers load ArcFace/RetinaFace in their own processes, so startup
+    # stays fast but the first upload doesn't pay the weight-loading cost.
+    inference_pool.start()
+    # Submissions accepted before a restart never got their background job
+    public.resume_queued_submissions()
     yield
+    video_pool.shutdown()
+    inference_pool.shutdown()
 
 
 app = FastAPI(
@@ -28,6 +40,8 @@ app = FastAPI(
     description="API for missing persons case management and face matching",
     version="1.5.0",
     lifespan=lifespan,
+    # orjson for every JSON response (routers inherit this default)
+    default_response_class=ORJSONResponse,
 )
 
 # CORS configuration - allow frontend
@@ -44,10 +58,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+class ImmutableStaticFiles(StaticFiles):
+    """
+    Uploaded photos and detection crops are named by UUID and never rewritten,
+    so browsers (and the Streamlit pages, via REUNITE_MEDIA_URL) can cache
+    them for good instead of re-fetching on every render.
+    """
+
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return response
+
+
 # Mount static files for serving images
 resources_path = os.path.join(os.path.dirname(__file__), "resources")
 if os.path.exists(resources_path):
-    app.mount("/resources", StaticFiles(directory=resources_path), name="resources")
+    app.mount("/resources", ImmutableStaticFiles(directory=resources_path), name="resources")
 
 # Mount video uploads directory for direct video access (Phase 2)
 video_uploads_path = os.path.join(os.path.dirname(__file__), "video_uploads")
@@ -75,3 +102,21 @@ async def root():
 async def health_check():
     """API health check."""
     return {"status": "ok"}
+
+
+if __name__ == "__main__":
+    # `python main.py` - production-style entrypoint. uvloop + httptools
+    # (both in uvicorn[standard]) cut per-request event-loop and HTTP parsing
+    # overhead; uvloop has no Windows build, so fall back to asyncio there.
+    import importlib.util
+    import uvicorn
+
+    uvicorn.run(
+        "main:app",
+        host=os.getenv("HOST", "127.0.0.1"),
+        port=int(os.getenv("PORT", "8000")),
+        loop="uvloop" if importlib.util.find_spec("uvloop") else "asyncio",
+        http="httptools" if importlib.util.find_spec("httptools") else "h11",
+        # Each worker runs its own inference pool and video jobs, so scale up deliberately
+        workers=int(os.getenv("UVICORN_WORKERS", "1")),
+    )
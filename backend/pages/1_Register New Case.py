@@ -1,79 +1,119 @@
+import os
 import uuid
-import json
 import base64
+import shutil
 import numpy as np
 import streamlit as st
 from pages.helper.data_models import RegisteredCases
+from pages.helper.embeddings import encode_embedding
+from pages.helper.photo_store import compact_image_file
 from pages.helper import db_queries
-from pages.helper.utils import image_obj_to_numpy, extract_face_encoding
+from pages.helper.streamlit_helpers import available_images, get_encoding_pool, stop_unless_logged_in
+from pages.helper.utils import encode_image_file
 st.set_page_config(page_title="Reunite AI – New Case")
 def image_to_base64(image_bytes: bytes) -> str:
     return base64.b64encode(image_bytes).decode("utf-8")
-if "login_status" not in st.session_state or not st.session_state["login_status"]:
-    st.write("You need to be logged in as admin to use this page.")
-else:
-    user = st.session_state.user
-    st.title("Create a New Missing Person Record")
-    image_col, form_col = st.columns(2)
-    image_obj = None
-    save_flag = False
-    face_encoding = None
-    unique_id = None
-    with image_col:
-        image_obj = st.file_uploader(
-            "Upload a clear face photo",
-            type=["jpg", "jpeg", "png"],
-            key="new_case",
-        )
-        if image_obj:
-            unique_id = str(uuid.uuid4())
+stop_unless_logged_in()
+
+user = st.session_state.user
+st.title("Create a New Missing Person Record")
+# Set just before the rerun that clears the form after a save
+if st.session_state.pop("new_case_saved", False):
+    st.success("New case has been saved in Reunite AI.")
+image_col, form_col = st.columns(2)
+image_obj = None
+save_flag = False
+face_encoding = None
+unique_id = None
+with image_col:
+    image_obj = st.file_uploader(
+        "Upload a clear face photo",
+        type=["jpg", "jpeg", "png"],
+        # Rotated after each save, which clears the uploader for the next case
+        key=f"new_case_{st.session_state.get('new_case_uploader', 0)}",
+    )
+    if image_obj:
+        # Every widget interaction reruns this script; save and encode each
+        # uploaded file once and reuse the result (and case ID) after that.
+        upload_key = getattr(image_obj, "file_id", None) or (image_obj.name, image_obj.size)
+        pending = st.session_state.get("new_case_upload")
+        if not pending or pending["key"] != upload_key:
+            unique_id = uuid.uuid4().hex
             uploaded_file_path = "./resources/" + unique_id + ".jpg"
+            # Copy in 1 MB chunks rather than materializing a second bytes copy of the photo
+            image_obj.seek(0)
             with open(uploaded_file_path, "wb") as output_temporary_file:
-                output_temporary_file.write(image_obj.read())
-            st.image(image_obj, caption="Uploaded image preview")
-            with st.spinner("Extracting facial features..."):
-                image_numpy = image_obj_to_numpy(image_obj)
-                face_encoding = extract_face_encoding(image_numpy)
-    if image_obj and face_encoding:
-        with form_col.form(key="new_case_form"):
-            st.subheader("Basic Information")
-            name = st.text_input("Full Name")
-            father_name = st.text_input("Father's Name (optional)")
-            age = st.number_input("Age", min_value=1, max_value=120, value=10, step=1)
-            st.subheader("Contact & Case Details")
-            mobile_number = st.text_input("Contact Number of Complainant")
-            address = st.text_input("Address")
-            adhaar_card = st.text_input("ID Document Number (e.g., Aadhaar)")
-            birthmarks = st.text_input("Visible Birth Marks / Identifying Features")
-            last_seen = st.text_input("Last Seen Location / Area")
-            description = st.text_area("Additional Description (optional)")
-            complainant_name = st.text_input("Complainant Name")
-            complainant_phone = st.text_input("Complainant Phone Number")
-            submit_bt = st.form_submit_button("Save Case")
-            # Ensure optional fields have default values (not None)
-            new_case_details = RegisteredCases(
-                id=unique_id,
-                submitted_by=user,
-                name=name if name else "Unknown",
-                father_name=father_name if father_name else "",
-                age=str(age),
-                complainant_mobile=mobile_number if mobile_number else "",
-                complainant_name=complainant_name if complainant_name else "",
-                face_mesh=json.dumps(face_encoding),  # 128-D encoding
-                adhaar_card=adhaar_card if adhaar_card else "",
-                birth_marks=birthmarks if birthmarks else "",
-                address=address if address else "",
-                last_seen=last_seen if last_seen else "",
-                status="NF",
-                matched_with="",
-            )
-            if submit_bt:
-                db_queries.register_new_case(new_case_details)
-                save_flag = True
-        if save_flag:
-            st.success("New case has been saved in Reunite AI.")
-    elif image_obj and not face_encoding:
-        st.warning(
-            "No face was detected in the uploaded image. "
-            "Please upload a clearer frontal photo."
-        )
\ No newline at end of file
+                shutil.copyfileobj(image_obj, output_temporary_file, 1 << 20)
+            available_images.clear()
+            # The worker decodes (downscaled) from disk, so only the path is
+            # sent to it; extraction overlaps the preview below
+            future = get_encoding_pool().submit(encode_image_file, uploaded_file_path)
+            pending = {"key": upload_key, "id": unique_id, "path": uploaded_file_path, "future": future}
+            st.session_state.new_case_upload = pending
+        unique_id = pending["id"]
+        image_obj.seek(0)
+        st.image(image_obj, caption="Uploaded image preview")
+        with st.spinner("Extracting facial features..."):
+            try:
+                face_encoding = pending["future"].result()
+            except Exception as e:
+                # Don't keep a failed result cached under this upload: drop
+                # it (and the saved photo) so the next rerun tries again
+                del st.session_state.new_case_upload
+                if os.path.exists(pending["path"]):
+                    os.remove(pending["path"])
+                available_images.clear()
+                st.error(f"Could not process the photo: {e}")
+                st.stop()
+        if not pending.get("compacted"):
+            # Encoded from the full upload; keep only a display-sized copy
+            compact_image_file(pending["path"])
+            pending["compacted"] = True
+if image_obj and face_encoding:
+    with form_col.form(key="new_case_form"):
+        st.subheader("Basic Information")
+        name = st.text_input("Full Name")
+        father_name = st.text_input("Father's Name (optional)")
+        age = st.number_input("Age", min_value=1, max_value=120, value=10, step=1)
+        st.subheader("Contact & Case Details")
+        mobile_number = st.text_input("Contact Number of Complainant")
+        address = st.text_input("Address")
+        adhaar_card = st.text_input("ID Document Number (e.g., Aadhaar)")
+        birthmarks = st.text_input("Visible Birth Marks / Identifying Features")
+        last_seen = st.text_input("Last Seen Location / Area")
+        description = st.text_area("Additional Description (optional)")
+        complainant_name = st.text_input("Complainant Name")
+        complainant_phone = st.text_input("Complainant Phone Number")
+        submit_bt = st.form_submit_button("Save Case")
+        # Ensure optional fields have default values (not None)
+        new_case_details = RegisteredCases(
+            id=unique_id,
+            submitted_by=user,
+            name=name if name else "Unknown",
+            father_name=father_name if father_name else "",
+            age=str(age),
+            complainant_mobile=mobile_number if mobile_number else "",
+            complainant_name=complainant_name if complainant_name else "",
+            face_mesh=encode_embedding(face_encoding),  # float32 bytes
+            adhaar_card=adhaar_card if adhaar_card else "",
+            birth_marks=birthmarks if birthmarks else "",
+            address=address if address else "",
+            last_seen=last_seen if last_seen else "",
+            status="NF",
+            matched_with=None,
+        )
+        if submit_bt:
+            db_queries.register_new_case(new_case_details)
+            save_flag = True
+    if save_flag:
+        # The case ID is used up: forget the upload and reset the uploader,
+        # so the form can't insert the same ID again
+        del st.session_state.new_case_upload
+        st.session_state.new_case_uploader = st.session_state.get("new_case_uploader", 0) + 1
+        st.session_state.new_case_saved = True
+        st.rerun()
+elif image_obj and not face_encoding:
+    st.warning(
+        "No face was detected in the uploaded image. "
+        "Please upload a clearer frontal photo."
+    )
\ No newline at end of file
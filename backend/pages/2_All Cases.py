@@ -3,10 +3,32 @@
 import os
 import streamlit as st
 from pages.helper import db_queries
+from pages.helper.streamlit_helpers import available_images, case_image_source, fragment, stop_unless_logged_in
 
 
 st.set_page_config(page_title="Reunite AI – All Cases")
 
+# Display label for each status code; other codes (e.g. 'queued') show as-is
+STATUS_LABEL = {"F": "Found", "NF": "Not Found"}.get
+
+
+# Every widget click reruns this script; serve the listings from cache instead
+# of re-querying SQLite each time. Deletes and the Refresh button clear them.
+@st.cache_data(ttl=60, show_spinner=False)
+def _load_registered_cases(user: str, status: str):
+    return [tuple(row) for row in db_queries.fetch_registered_cases(user, status)]
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _load_public_cases():
+    return [tuple(row) for row in db_queries.fetch_public_cases(False, status="NF")]
+
+
+def _clear_case_caches():
+    _load_registered_cases.clear()
+    _load_public_cases.clear()
+    available_images.clear()
+
 
 def delete_case_with_image(case_id: str, is_public: bool = False):
     """Delete a case and its associated image file."""
@@ -24,25 +46,44 @@ def delete_case_with_image(case_id: str, is_public: bool = False):
         except OSError as e:
             st.warning(f"Could not delete image file: {e}")
 
+    _clear_case_caches()
+
+
+def delete_cases_with_images(case_ids, is_public: bool = False):
+    """Bulk version of delete_case_with_image: one DB commit, then one pass over the photos."""
+    case_ids = list(case_ids)
+    if is_public:
+        db_queries.delete_public_cases_bulk(case_ids)
+    else:
+        db_queries.delete_registered_cases_bulk(case_ids)
+
+    for case_id in case_ids:
+        try:
+            os.remove(f"./resources/{case_id}.jpg")
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            st.warning(f"Could not delete image file: {e}")
+
+    _clear_case_caches()
+
 
-def case_viewer(case, selected_cases: set):
+@fragment
+def case_viewer(case, selected_cases: set, matched_details: dict, existing_images: frozenset):
     """
     Display a single registered case with checkbox for selection.
+
+    Rendered as a fragment: ticking the checkbox reruns only this row, not
+    the listing query and every other row.
+
+    matched_details ({public_id: details}) and existing_images (filenames in
+    ./resources) are loaded once per page render, not per case.
     """
     case = list(case)
     case_id = str(case.pop(0))
     matched_with_id = case.pop(4)
     phone = case.pop()
-    matched_with_details = None
-
-    if matched_with_id:
-        try:
-            matched_with_id = str(matched_with_id).replace("{", "").replace("}", "")
-        except Exception:
-            matched_with_id = None
-
-    if matched_with_id:
-        matched_with_details = db_queries.get_public_case_detail(matched_with_id)
+    matched_with_details = matched_details.get(matched_with_id) if matched_with_id else None
 
     # Checkbox for selection
     col_check, data_col, image_col, action_col = st.columns([0.5, 2, 1.5, 2])
@@ -54,22 +95,21 @@ def case_viewer(case, selected_cases: set):
         selected_cases.discard(case_id)
 
     for label, value in zip(["Name", "Age", "Status", "Last Seen"], case):
-        if label == "Status":
-            value = "Found" if value == "F" else "Not Found"
+        value = STATUS_LABEL(value, value) if label == "Status" else value
         data_col.write(f"**{label}:** {value}")
     data_col.write(f"**Contact:** {phone}")
 
-    try:
+    if case_id + ".jpg" in existing_images:
         image_col.image(
-            "./resources/" + case_id + ".jpg",
+            case_image_source(case_id),
             width=120,
             use_container_width=False,
         )
-    except Exception:
+    else:
         image_col.warning("No image available.")
 
     if matched_with_details:
-        loc, submitted_by, mobile, birth_marks = matched_with_details[0]
+        loc, submitted_by, mobile, birth_marks = matched_with_details
         action_col.write("**Matched public report:**")
         action_col.write(f"- Location: {loc}")
         action_col.write(f"- Submitted by: {submitted_by}")
@@ -86,8 +126,9 @@ def case_viewer(case, selected_cases: set):
     return is_selected
 
 
-def public_case_viewer(case: list, selected_public_cases: set) -> None:
-    """Display a public submission in the admin view with delete option."""
+@fragment
+def public_case_viewer(case: list, selected_public_cases: set, existing_images: frozenset) -> None:
+    """Display a public submission in the admin view with delete option (a fragment, like case_viewer)."""
     case = list(case)
     case_id = str(case.pop(0))
 
@@ -104,17 +145,16 @@ def public_case_viewer(case: list, selected_public_cases: set) -> None:
         ["Status", "Location", "Mobile", "Birth Marks", "Submitted on", "Submitted by"],
         case,
     ):
-        if text == "Status":
-            value = "Found" if value == "F" else "Not Found"
+        value = STATUS_LABEL(value, value) if text == "Status" else value
         data_col.write(f"**{text}:** {value}")
 
-    try:
+    if case_id + ".jpg" in existing_images:
         image_col.image(
-            "./resources/" + case_id + ".jpg",
+            case_image_source(case_id),
             width=120,
             use_container_width=False,
         )
-    except Exception:
+    else:
         image_col.warning("Couldn't load image for this submission.")
 
     # Add delete button for public submissions
@@ -134,74 +174,117 @@ if "selected_public_cases" not in st.session_state:
     st.session_state.selected_public_cases = set()
 
 
-if "login_status" not in st.session_state or not st.session_state["login_status"]:
-    st.write("You need to be logged in as admin to use this page.")
-else:
-    user = st.session_state.user
+# Rows rendered per step; "Show more" renders the next batch
+PAGE_SIZE = 25
 
-    st.title("Your Registered Cases & Public Reports")
 
-    status_col, date_col = st.columns(2)
-    status = status_col.selectbox(
-        "Show",
-        options=["All", "Not Found", "Found", "Public Submissions"],
-    )
-    _ = date_col.date_input("Filter by date (not applied yet)")
+def _visible_rows(view: str, total: int) -> int:
+    """How many rows of this view to render on this run (resets when the view changes)."""
+    if st.session_state.get("listing_view") != view:
+        st.session_state.listing_view = view
+        st.session_state.listing_shown = PAGE_SIZE
+    return min(total, st.session_state.listing_shown)
 
-    st.write("---")
-    
-    # Bulk delete controls for REGISTERED cases
-    if status != "Public Submissions":
-        bulk_col1, bulk_col2, bulk_col3 = st.columns([1, 1, 2])
-        
-        if bulk_col1.button("Select All"):
-            cases_data = db_queries.fetch_registered_cases(user, status)
-            st.session_state.selected_cases = {str(case[0]) for case in cases_data}
+
+def _show_more_button(shown: int, total: int):
+    if shown < total and st.button(f"Show more ({total - shown} remaining)"):
+        st.session_state.listing_shown += PAGE_SIZE
+        st.rerun()
+
+
+def _bulk_delete_bar(selection_key: str, load_cases, is_public: bool, noun: str):
+    """
+    Select All / Clear Selection / Delete Selected for one listing.
+
+    Row checkboxes rerun only their own fragment, so the count shown here is
+    as of the last full rerun. Delete Selected therefore asks for
+    confirmation, showing the exact selection (which may include rows not yet
+    rendered, after Select All) it is about to delete.
+    """
+    bulk_col1, bulk_col2, bulk_col3 = st.columns([1, 1, 2])
+
+    if bulk_col1.button("Select All"):
+        st.session_state[selection_key] = {str(case[0]) for case in load_cases()}
+        st.rerun()
+
+    if bulk_col2.button("Clear Selection"):
+        st.session_state[selection_key] = set()
+        st.session_state.pop("pending_bulk_delete", None)
+        st.rerun()
+
+    selected = st.session_state[selection_key]
+    pending = st.session_state.get("pending_bulk_delete")
+    if pending and pending[0] == selection_key:
+        # Delete the snapshot the admin confirmed, not whatever is ticked now
+        pending_ids = pending[1]
+        bulk_col3.warning(f"Delete {len(pending_ids)} {noun}(s)? This cannot be undone.")
+        confirm_col, cancel_col = bulk_col3.columns(2)
+        if confirm_col.button("Confirm delete", type="primary"):
+            delete_cases_with_images(pending_ids, is_public=is_public)
+            st.session_state[selection_key] = set()
+            del st.session_state.pending_bulk_delete
+            st.success(f"Deleted {len(pending_ids)} {noun}(s).")
             st.rerun()
-        
-        if bulk_col2.button("Clear Selection"):
-            st.session_state.selected_cases = set()
+        if cancel_col.button("Cancel"):
+            del st.session_state.pending_bulk_delete
             st.rerun()
-        
-        if st.session_state.selected_cases:
-            bulk_col3.warning(f"{len(st.session_state.selected_cases)} case(s) selected")
-            if bulk_col3.button("🗑️ Delete Selected", type="primary"):
-                for case_id in list(st.session_state.selected_cases):
-                    delete_case_with_image(case_id, is_public=False)
-                st.session_state.selected_cases = set()
-                st.success("Selected cases deleted!")
-                st.rerun()
-        
-        st.write("---")
-        
-        cases_data = db_queries.fetch_registered_cases(user, status)
-        for case in cases_data:
-            case_viewer(case, st.session_state.selected_cases)
-    
-    # Bulk delete controls for PUBLIC SUBMISSIONS
     else:
-        bulk_col1, bulk_col2, bulk_col3 = st.columns([1, 1, 2])
-        
-        if bulk_col1.button("Select All"):
-            cases_data = db_queries.fetch_public_cases(False, status="NF")
-            st.session_state.selected_public_cases = {str(case[0]) for case in cases_data}
-            st.rerun()
-        
-        if bulk_col2.button("Clear Selection"):
-            st.session_state.selected_public_cases = set()
-            st.rerun()
-        
-        if st.session_state.selected_public_cases:
-            bulk_col3.warning(f"{len(st.session_state.selected_public_cases)} submission(s) selected")
-            if bulk_col3.button("🗑️ Delete Selected", type="primary"):
-                for case_id in list(st.session_state.selected_public_cases):
-                    delete_case_with_image(case_id, is_public=True)
-                st.session_state.selected_public_cases = set()
-                st.success("Selected public submissions deleted!")
+        if selected:
+            bulk_col3.warning(f"{len(selected)} {noun}(s) selected")
+        if bulk_col3.button("🗑️ Delete Selected", type="primary"):
+            if selected:
+                st.session_state.pending_bulk_delete = (selection_key, frozenset(selected))
                 st.rerun()
-        
-        st.write("---")
-        
-        cases_data = db_queries.fetch_public_cases(False, status="NF")
-        for case in cases_data:
-            public_case_viewer(case, st.session_state.selected_public_cases)
+            else:
+                bulk_col3.info("Nothing selected.")
+
+    st.write("---")
+
+
+stop_unless_logged_in()
+
+user = st.session_state.user
+
+st.title("Your Registered Cases & Public Reports")
+
+status_col, date_col = st.columns(2)
+status = status_col.selectbox(
+    "Show",
+    options=["All", "Not Found", "Found", "Public Submissions"],
+)
+_ = date_col.date_input("Filter by date (not applied yet)")
+
+if st.button("Refresh"):
+    _clear_case_caches()
+
+st.write("---")
+
+# Bulk delete controls for REGISTERED cases
+if status != "Public Submissions":
+    _bulk_delete_bar("selected_cases", lambda: _load_registered_cases(user, status), False, "case")
+
+    cases_data = _load_registered_cases(user, status)
+    # Render the first PAGE_SIZE rows rather than the whole list before the
+    # page settles; the rest is a click away
+    shown = _visible_rows(status, len(cases_data))
+    visible_cases = cases_data[:shown]
+    # One IN query for all matched reports and one directory listing for
+    # all photos, instead of a query and a file open per case
+    matched_details = db_queries.get_public_case_details_bulk(
+        case[5] for case in visible_cases if case[5]
+    )
+    existing_images = available_images()
+    for case in visible_cases:
+        case_viewer(case, st.session_state.selected_cases, matched_details, existing_images)
+    _show_more_button(shown, len(cases_data))
+
+# Bulk delete controls for PUBLIC SUBMISSIONS
+else:
+    _bulk_delete_bar("selected_public_cases", _load_public_cases, True, "public submission")
+
+    cases_data = _load_public_cases()
+    shown = _visible_rows(status, len(cases_data))
+    existing_images = available_images()
+    for case in cases_data[:shown]:
+        public_case_viewer(case, st.session_state.selected_public_cases, existing_images)
+    _show_more_button(shown, len(cases_data))
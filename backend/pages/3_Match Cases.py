@@ -3,6 +3,7 @@
 import streamlit as st
 
 from pages.helper import db_queries, match_algo, train_model
+from pages.helper.streamlit_helpers import available_images, case_image_source, stop_unless_logged_in
 
 
 def case_viewer(registered_case_id, public_case_id):
@@ -25,43 +26,42 @@ def case_viewer(registered_case_id, public_case_id):
             "Case status updated to 'Found'. It will now appear under found cases."
         )
 
-        try:
+        if registered_case_id + ".jpg" in available_images():
             image_col.image(
-                "./resources/" + registered_case_id + ".jpg",
+                case_image_source(registered_case_id),
                 width=80,
                 use_container_width=False,
             )
-        except Exception:
+        else:
             image_col.warning("Could not load image for this case.")
 
     except Exception as e:
         st.error(f"Something went wrong while processing this match: {str(e)}")
 
 
-if "login_status" not in st.session_state or not st.session_state["login_status"]:
-    st.write("You need to be logged in as admin to use this page.")
-else:
-    user = st.session_state.user
+stop_unless_logged_in()
+
+user = st.session_state.user
 
-    st.title("Run Face Matching (Reunite AI)")
+st.title("Run Face Matching (Reunite AI)")
 
-    col1, _ = st.columns(2)
-    refresh_bt = col1.button("Refresh & Run Matching")
-    st.write("---")
+col1, _ = st.columns(2)
+refresh_bt = col1.button("Refresh & Run Matching")
+st.write("---")
 
-    if refresh_bt:
-        with st.spinner("Preparing data and training model..."):
-            result = train_model.train(user)
+if refresh_bt:
+    with st.spinner("Preparing data and training model..."):
+        result = train_model.train(user)
 
-        with st.spinner("Searching for possible matches..."):
-            matched_ids = match_algo.match()
+    with st.spinner("Searching for possible matches..."):
+        matched_ids = match_algo.match()
 
-        if not matched_ids["status"]:
-            st.info(matched_ids.get("message", "No match result available."))
+    if not matched_ids["status"]:
+        st.info(matched_ids.get("message", "No match result available."))
+    else:
+        if not matched_ids["result"]:
+            st.info("No potential matches found at the moment.")
         else:
-            if not matched_ids["result"]:
-                st.info("No potential matches found at the moment.")
-            else:
-                for matched_id, submitted_case_id in matched_ids["result"].items():
-                    case_viewer(matched_id, submitted_case_id[0])
-                    st.write("---")
+            for matched_id, submitted_case_id in matched_ids["result"].items():
+                case_viewer(matched_id, submitted_case_id[0])
+                st.write("---")
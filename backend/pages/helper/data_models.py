@@ -1,7 +1,9 @@
+import secrets
 from uuid import uuid4
 from datetime import datetime
 from typing import Optional
 
+from sqlalchemy import Column, LargeBinary
 from sqlmodel import Field, create_engine, SQLModel
 
 
@@ -9,10 +11,16 @@ class PublicSubmissions(SQLModel, table=True):
     __table_args__ = {"extend_existing": True}
    
     id: str = Field(
-        primary_key=True, default_factory=lambda: str(uuid4()), nullable=False
+        primary_key=True, default_factory=lambda: uuid4().hex, nullable=False
+    )
+    # Short Report ID shown to the person who submitted; id stays internal
+    public_ref: Optional[str] = Field(
+        default_factory=lambda: secrets.token_urlsafe(8),
+        max_length=12, unique=True, index=True, nullable=True,
     )
     submitted_by: str = Field(max_length=128, nullable=True)
-    face_mesh: str = Field(nullable=False)  
+    # float32 embedding bytes, see helper/embeddings.py
+    face_mesh: bytes = Field(sa_column=Column(LargeBinary, nullable=False))
     location: str = Field(max_length=128, nullable=True)
     mobile: str = Field(max_length=10, nullable=False)
     email: str = Field(max_length=64, nullable=True)
@@ -26,7 +34,7 @@ class RegisteredCases(SQLModel, table=True):
     __table_args__ = {"extend_existing": True}
     
     id: str = Field(
-        primary_key=True, default_factory=lambda: str(uuid4()), nullable=False
+        primary_key=True, default_factory=lambda: uuid4().hex, nullable=False
     )
     submitted_by: str = Field(max_length=64, nullable=False)
     name: str = Field(max_length=128, nullable=False)
@@ -37,11 +45,16 @@ class RegisteredCases(SQLModel, table=True):
     adhaar_card: str = Field(max_length=12)
     last_seen: str = Field(max_length=64)
     address: str = Field(max_length=512)
-    face_mesh: str = Field(nullable=False)  
-    submitted_on: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+    # float32 embedding bytes, see helper/embeddings.py
+    face_mesh: bytes = Field(sa_column=Column(LargeBinary, nullable=False))
+    submitted_on: datetime = Field(default_factory=datetime.utcnow, nullable=False, index=True)
     status: str = Field(max_length=16, nullable=False)
     birth_marks: str = Field(max_length=512)
-    matched_with: str = Field(nullable=True)
+    # Bare ID of the matched public submission, NULL until a match is found
+    # (indexed by the partial idx_reg_matched_with, see db_queries.INDEX_DDL)
+    matched_with: Optional[str] = Field(
+        default=None, foreign_key="publicsubmissions.id", nullable=True
+    )
 
 
 
@@ -49,7 +62,7 @@ class VideoUploads(SQLModel, table=True):
     __table_args__ = {"extend_existing": True}
 
     id: str = Field(
-        primary_key=True, default_factory=lambda: str(uuid4()), nullable=False
+        primary_key=True, default_factory=lambda: uuid4().hex, nullable=False
     )
     filename: str = Field(max_length=256, nullable=False)
     file_path: str = Field(max_length=512, nullable=False)
@@ -69,7 +82,7 @@ class VideoDetections(SQLModel, table=True):
     __table_args__ = {"extend_existing": True}
 
     id: str = Field(
-        primary_key=True, default_factory=lambda: str(uuid4()), nullable=False
+        primary_key=True, default_factory=lambda: uuid4().hex, nullable=False
     )
     video_id: str = Field(max_length=64, nullable=False)
     case_id: str = Field(max_length=64, nullable=False)
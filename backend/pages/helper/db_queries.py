@@ -1,12 +1,47 @@
 
-from sqlmodel import create_engine, Session, select
+import os
+import secrets
+import threading
+import time
+from typing import Optional
+
+from sqlalchemy import bindparam, event, insert, update
+from sqlalchemy.exc import NoResultFound
+from sqlmodel import SQLModel, create_engine, Session, select, func, delete, or_
 
 from pages.helper.data_models import (
     RegisteredCases, PublicSubmissions, VideoUploads, VideoDetections
 )
+from pages.helper.embeddings import decode_embedding, encode_embedding
+
+# REUNITE_DATABASE_URL points tests/dev runs at another SQLite file, e.g. one
+# on tmpfs (sqlite:////dev/shm/reunite.db) to keep a scratch database in RAM.
+# It stays a file so the API, Streamlit and video worker processes share it.
+sqlite_url = os.getenv("REUNITE_DATABASE_URL", "sqlite:///sqlite_database.db")
+# One engine per process. The API runs queries from its threadpool, so
+# connections are shared across threads and the pool is sized above the
+# default 5 + 10 to keep concurrent requests from queueing on checkout.
+engine = create_engine(
+    sqlite_url,
+    connect_args={"check_same_thread": False},
+    pool_size=10,
+    max_overflow=20,
+)
 
-sqlite_url = "sqlite:///sqlite_database.db"
-engine = create_engine(sqlite_url)
+
+@event.listens_for(engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    WAL lets the statistics/matching reads run while an upload is inserting;
+    synchronous=NORMAL is durable under WAL except on power loss.
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")  # 256 MB
+    cursor.execute("PRAGMA cache_size=-65536")  # 64 MB page cache per connection
+    cursor.close()
 
 
 
@@ -15,169 +50,312 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+# Indexes that can't be declared as plain column indexes on the models
+INDEX_DDL = [
+    # Dashboard "recent matches": open cases with a pending AI match, newest first
+    "CREATE INDEX IF NOT EXISTS idx_reg_recent_matches ON registeredcases(submitted_on DESC) "
+    "WHERE matched_with IS NOT NULL AND status = 'NF'",
+    # Public submission -> matched case lookup (matched_with = ?). Most cases
+    # are unmatched, so only the non-NULL rows are indexed; this replaces the
+    # full column index the model used to declare
+    "DROP INDEX IF EXISTS ix_registeredcases_matched_with",
+    "CREATE INDEX IF NOT EXISTS idx_reg_matched_with ON registeredcases(matched_with) "
+    "WHERE matched_with IS NOT NULL",
+    # Admin listing: WHERE submitted_by = ? AND status IN (...) ORDER BY submitted_on DESC
+    "CREATE INDEX IF NOT EXISTS idx_reg_user_status ON registeredcases(submitted_by, status, submitted_on DESC)",
+    # Admin listing with status "All": no status predicate, walk by date
+    "CREATE INDEX IF NOT EXISTS idx_reg_user_date ON registeredcases(submitted_by, submitted_on DESC)",
+    # Open-case listing and matching candidates: only the 'NF' slice, newest first
+    "CREATE INDEX IF NOT EXISTS idx_reg_open ON registeredcases(submitted_on DESC) WHERE status = 'NF'",
+    # Public listing / matching: WHERE status = ? ORDER BY submitted_on DESC
+    "CREATE INDEX IF NOT EXISTS idx_pub_status ON publicsubmissions(status, submitted_on DESC)",
+    # Video results: detections for a case ordered by confidence, uploads for a case
+    "CREATE INDEX IF NOT EXISTS idx_det_case_confidence ON videodetections(case_id, confidence DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_det_video ON videodetections(video_id)",
+    "CREATE INDEX IF NOT EXISTS idx_upload_case ON videouploads(case_id)",
+]
+
+
+def _paged(query):
+    """
+    Add LIMIT/OFFSET bind parameters so SQLite stops after the requested page.
+
+    The listing statements below are built once at import with bind
+    parameters; each call only binds values, instead of rebuilding the
+    select() tree and its cache key per request.
+    """
+    return query.limit(bindparam("limit")).offset(bindparam("offset"))
+
+
+def _page_params(limit: Optional[int], offset: int) -> dict:
+    """Bind values for _paged; LIMIT -1 is SQLite's "no limit"."""
+    return {"limit": limit or -1, "offset": offset or 0}
+
+
+STREAM_BATCH_SIZE = 500
+
+
+def _stream_rows(query, batch_size: int = STREAM_BATCH_SIZE):
+    """
+    Yield the rows of query, fetched batch_size at a time, instead of
+    materializing the whole result with .all(). The session stays open until
+    the generator is exhausted or closed.
+    """
+    with Session(engine) as session:
+        yield from session.exec(query.execution_options(yield_per=batch_size))
+
+
 def create_db():
-    """Create tables if they do not already exist."""
-    for model in [RegisteredCases, PublicSubmissions, VideoUploads, VideoDetections]:
-        try:
-            model.__table__.create(engine)
-        except Exception:
-            # Table already exists – ignore
-            pass
+    """Create tables and indexes if they do not already exist, then run the one-shot migrations."""
+    SQLModel.metadata.create_all(engine)
+
+    # Tables created by an older version: add new columns first, then any
+    # column indexes declared on the models since (create_all only indexes
+    # the tables it creates)
+    add_public_ref_column()
+    with engine.begin() as conn:
+        for table in SQLModel.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+        for ddl in INDEX_DDL:
+            conn.exec_driver_sql(ddl)
+
+    migrate_legacy_embeddings()
+    normalize_matched_with()
+
+
+def add_public_ref_column():
+    """
+    One-shot migration for tables created before public_ref existed: add the
+    column and give every existing submission a Report ID.
+    """
+    with engine.begin() as conn:
+        columns = {row[1] for row in conn.exec_driver_sql("PRAGMA table_info(publicsubmissions)")}
+        if "public_ref" not in columns:
+            conn.exec_driver_sql("ALTER TABLE publicsubmissions ADD COLUMN public_ref VARCHAR(12)")
+        missing = conn.exec_driver_sql(
+            "SELECT id FROM publicsubmissions WHERE public_ref IS NULL"
+        ).all()
+        if missing:
+            conn.exec_driver_sql(
+                "UPDATE publicsubmissions SET public_ref = ? WHERE id = ?",
+                [(secrets.token_urlsafe(8), case_id) for (case_id,) in missing],
+            )
+            logger.info(f"Assigned Report IDs to {len(missing)} public submissions")
+
+
+def normalize_matched_with():
+    """
+    One-shot clean-up of matched_with: older rows hold '' for "no match" or
+    the ID wrapped in braces. Store NULL / the bare ID so it can be compared
+    and joined directly.
+    """
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "UPDATE registeredcases "
+            "SET matched_with = NULLIF(REPLACE(REPLACE(matched_with, '{', ''), '}', ''), '') "
+            "WHERE matched_with = '' OR matched_with LIKE '{%'"
+        )
+
+
+def migrate_legacy_embeddings():
+    """
+    One-shot conversion of face_mesh values still stored as JSON text to
+    float32 bytes. Rows that can't be decoded are left for fix_zero_vectors.py.
+    Once every row is binary this is a quick scan that finds nothing.
+    """
+    converted = 0
+    with engine.begin() as conn:
+        for table in (RegisteredCases.__tablename__, PublicSubmissions.__tablename__):
+            rows = conn.exec_driver_sql(
+                f"SELECT id, face_mesh FROM {table} WHERE typeof(face_mesh) = 'text'"
+            ).all()
+            updates = []
+            for case_id, face_mesh in rows:
+                encoding = decode_embedding(face_mesh)
+                if encoding is not None:
+                    updates.append((encode_embedding(encoding), case_id))
+            if updates:
+                conn.exec_driver_sql(f"UPDATE {table} SET face_mesh = ? WHERE id = ?", updates)
+                converted += len(updates)
+    if converted:
+        logger.info(f"Converted {converted} JSON face_mesh values to float32 bytes")
 
 
 def register_new_case(case_details: RegisteredCases):
     """Insert a new registered case."""
-    # create_db()
     with Session(engine) as session:
         session.add(case_details)
         session.commit()
 
 
-def fetch_registered_cases(submitted_by: str, status: str):
+_REGISTERED_CASE_COLUMNS = (
+    RegisteredCases.id,
+    RegisteredCases.name,
+    RegisteredCases.age,
+    RegisteredCases.status,
+    RegisteredCases.last_seen,
+    RegisteredCases.matched_with,
+    RegisteredCases.complainant_mobile,
+    RegisteredCases.birth_marks,
+    RegisteredCases.father_name,
+    RegisteredCases.address,
+    RegisteredCases.complainant_name,
+    RegisteredCases.submitted_on,
+)
+
+# "All" has no status predicate (every case is 'F' or 'NF'), so SQLite walks
+# idx_reg_user_date in order; a single status is an equality on idx_reg_user_status
+_FETCH_USER_CASES = _paged(
+    select(*_REGISTERED_CASE_COLUMNS)
+    .where(RegisteredCases.submitted_by == bindparam("submitted_by"))
+    .order_by(RegisteredCases.submitted_on.desc())
+)
+
+_FETCH_USER_CASES_BY_STATUS = _paged(
+    select(*_REGISTERED_CASE_COLUMNS)
+    .where(RegisteredCases.submitted_by == bindparam("submitted_by"))
+    .where(RegisteredCases.status == bindparam("status"))
+    .order_by(RegisteredCases.submitted_on.desc())
+)
+
+
+def fetch_registered_cases(submitted_by: str, status: str, limit: Optional[int] = None, offset: int = 0):
     """
     Fetch registered cases for a particular admin user, filtered by status.
     Status: "All" | "Found" | "Not Found"
+    limit/offset page through the newest-first results (no limit by default).
     """
-    if status == "All":
-        status_list = ["F", "NF"]
-    elif status == "Found":
-        status_list = ["F"]
+    params = {"submitted_by": submitted_by, **_page_params(limit, offset)}
+    if status == "Found":
+        query, params["status"] = _FETCH_USER_CASES_BY_STATUS, "F"
     elif status == "Not Found":
-        status_list = ["NF"]
+        query, params["status"] = _FETCH_USER_CASES_BY_STATUS, "NF"
     else:
-        status_list = ["F", "NF"]
+        # "All" (and anything unrecognised)
+        query = _FETCH_USER_CASES
 
-    # create_db()
     with Session(engine) as session:
-        result = session.exec(
-            select(
-                RegisteredCases.id,
-                RegisteredCases.name,
-                RegisteredCases.age,
-                RegisteredCases.status,
-                RegisteredCases.last_seen,
-                RegisteredCases.matched_with,
-                RegisteredCases.complainant_mobile,
-                RegisteredCases.birth_marks,
-                RegisteredCases.father_name,
-                RegisteredCases.address,
-                RegisteredCases.complainant_name,
-                RegisteredCases.submitted_on,
-            )
-            .where(RegisteredCases.submitted_by == submitted_by)
-            .where(RegisteredCases.status.in_(status_list))
-            .order_by(RegisteredCases.submitted_on.desc())
-        ).all()
+        result = session.exec(query, params=params).all()
         return result
 
 
-def fetch_all_not_found_registered_cases():
+_ALL_REGISTERED_CASE_COLUMNS = (
+    RegisteredCases.id,
+    RegisteredCases.name,
+    RegisteredCases.age,
+    RegisteredCases.status,
+    RegisteredCases.last_seen,
+    RegisteredCases.birth_marks,
+    RegisteredCases.father_name,
+    RegisteredCases.address,
+    RegisteredCases.complainant_name,
+    RegisteredCases.complainant_mobile,
+    RegisteredCases.submitted_on,
+    RegisteredCases.matched_with,
+)
+
+_FETCH_ALL_NOT_FOUND_CASES = _paged(
+    select(*_ALL_REGISTERED_CASE_COLUMNS)
+    .where(RegisteredCases.status == "NF")
+    .order_by(RegisteredCases.submitted_on.desc())
+)
+
+
+def fetch_all_not_found_registered_cases(limit: Optional[int] = None, offset: int = 0):
     """
     Fetch ALL registered cases across all admins where status is 'NF'.
 
     Used in the PUBLIC app to list all currently missing people.
     """
-    # create_db()
     with Session(engine) as session:
         result = session.exec(
-            select(
-                RegisteredCases.id,
-                RegisteredCases.name,
-                RegisteredCases.age,
-                RegisteredCases.status,
-                RegisteredCases.last_seen,
-                RegisteredCases.birth_marks,
-                RegisteredCases.father_name,
-                RegisteredCases.address,
-                RegisteredCases.complainant_name,
-                RegisteredCases.complainant_mobile,
-                RegisteredCases.submitted_on,
-            )
-            .where(RegisteredCases.status == "NF")
-            .order_by(RegisteredCases.submitted_on.desc())
+            _FETCH_ALL_NOT_FOUND_CASES, params=_page_params(limit, offset)
         ).all()
         return result
 
 
-def fetch_all_registered_cases():
+_FETCH_ALL_REGISTERED_CASES = _paged(
+    select(*_ALL_REGISTERED_CASE_COLUMNS).order_by(RegisteredCases.submitted_on.desc())
+)
+
+
+def fetch_all_registered_cases(limit: Optional[int] = None, offset: int = 0):
     """
     Fetch ALL registered cases across all admins (both Found and Not Found).
     
     Used in web app to list all cases regardless of status.
     """
-    # create_db()
     with Session(engine) as session:
         result = session.exec(
-            select(
-                RegisteredCases.id,
-                RegisteredCases.name,
-                RegisteredCases.age,
-                RegisteredCases.status,
-                RegisteredCases.last_seen,
-                RegisteredCases.birth_marks,
-                RegisteredCases.father_name,
-                RegisteredCases.address,
-                RegisteredCases.complainant_name,
-                RegisteredCases.complainant_mobile,
-                RegisteredCases.submitted_on,
-            )
-            .order_by(RegisteredCases.submitted_on.desc())
+            _FETCH_ALL_REGISTERED_CASES, params=_page_params(limit, offset)
         ).all()
         return result
 
 
-def fetch_public_cases(train_data: bool, status: str):
+_PUBLIC_CASE_COLUMNS = (
+    PublicSubmissions.id,
+    PublicSubmissions.status,
+    PublicSubmissions.location,
+    PublicSubmissions.mobile,
+    PublicSubmissions.birth_marks,
+    PublicSubmissions.submitted_on,
+    PublicSubmissions.submitted_by,
+)
+
+_FETCH_ALL_PUBLIC_CASES = _paged(
+    select(*_PUBLIC_CASE_COLUMNS).order_by(PublicSubmissions.submitted_on.desc())
+)
+
+_FETCH_PUBLIC_CASES = _paged(
+    select(*_PUBLIC_CASE_COLUMNS)
+    .where(PublicSubmissions.status == bindparam("status"))
+    .order_by(PublicSubmissions.submitted_on.desc())
+)
+
+
+def fetch_public_cases(train_data: bool, status: str, limit: Optional[int] = None, offset: int = 0):
     """
     Fetch public submissions.
 
-    If train_data=True, returns only ID + face_mesh (for model/matching).
-    Otherwise returns details for admin view.
+    If train_data=True, returns an iterator of ID + face_mesh rows (for
+    model/matching), streamed in batches since every row carries an embedding.
+    Otherwise returns details for admin view, newest first, paged by limit/offset.
     """
-    # create_db()
     if train_data:
-        with Session(engine) as session:
-            query = select(PublicSubmissions.id, PublicSubmissions.face_mesh)
-            if status != "All":
-                query = query.where(PublicSubmissions.status == status)
-            
-            result = session.exec(query).all()
-            return result
-
-    with Session(engine) as session:
-        query = select(
-            PublicSubmissions.id,
-            PublicSubmissions.status,
-            PublicSubmissions.location,
-            PublicSubmissions.mobile,
-            PublicSubmissions.birth_marks,
-            PublicSubmissions.submitted_on,
-            PublicSubmissions.submitted_by,
-        )
+        query = select(PublicSubmissions.id, PublicSubmissions.face_mesh)
         if status != "All":
             query = query.where(PublicSubmissions.status == status)
-            
-        result = session.exec(
-            query.order_by(PublicSubmissions.submitted_on.desc())
-        ).all()
+        return _stream_rows(query)
+
+    with Session(engine) as session:
+        if status == "All":
+            query, params = _FETCH_ALL_PUBLIC_CASES, _page_params(limit, offset)
+        else:
+            query, params = _FETCH_PUBLIC_CASES, {"status": status, **_page_params(limit, offset)}
+        result = session.exec(query, params=params).all()
         return result
 
 
 def get_not_confirmed_registered_cases(submitted_by: str):
     """
-    Returns all registered cases for the given admin.
+    Returns (id, name, status, face_mesh) for all registered cases of the given admin.
     Used for model training where only 'NF' might be required.
     """
-    # create_db()
     with Session(engine) as session:
         result = session.exec(
-            select(RegisteredCases).where(RegisteredCases.submitted_by == submitted_by)
+            select(
+                RegisteredCases.id,
+                RegisteredCases.name,
+                RegisteredCases.status,
+                RegisteredCases.face_mesh,
+            ).where(RegisteredCases.submitted_by == submitted_by)
         ).all()
         return result
 
 
 def get_training_data(submitted_by: str):
     """Return IDs and face_mesh for 'NF' cases submitted by a specific admin."""
-    # create_db()
     with Session(engine) as session:
         result = session.exec(
             select(RegisteredCases.id, RegisteredCases.face_mesh)
@@ -189,15 +367,32 @@ def get_training_data(submitted_by: str):
 
 def new_public_case(public_case_details: PublicSubmissions):
     """Insert a new public sighting/submission."""
-    # create_db()
     with Session(engine) as session:
         session.add(public_case_details)
         session.commit()
 
 
+def update_public_submission(submission_id: str, status: str, face_mesh: Optional[bytes] = None):
+    """Set the status (and the encoding, once extracted) of a queued public submission."""
+    with Session(engine) as session:
+        submission = session.get(PublicSubmissions, submission_id)
+        if not submission:
+            return
+        submission.status = status
+        if face_mesh is not None:
+            submission.face_mesh = face_mesh
+        session.add(submission)
+        session.commit()
+
+
+def get_queued_public_submission_ids() -> list:
+    """IDs of public submissions whose face extraction hasn't finished."""
+    with Session(engine) as session:
+        return list(session.exec(select(PublicSubmissions.id).where(PublicSubmissions.status == "queued")))
+
+
 def get_public_case_detail(case_id: str):
     """Return detailed info about a public submission for admin matching view."""
-    # create_db()
     with Session(engine) as session:
         result = session.exec(
             select(
@@ -210,13 +405,36 @@ def get_public_case_detail(case_id: str):
         return result
 
 
+def get_public_case_details_bulk(case_ids):
+    """
+    get_public_case_detail for many IDs in one IN query (chunked for SQLite's
+    bound-parameter limit). Returns {id: (location, submitted_by, mobile, birth_marks)}.
+    """
+    case_ids = list(dict.fromkeys(case_ids))
+    details = {}
+    with Session(engine) as session:
+        for start in range(0, len(case_ids), 500):
+            rows = session.exec(
+                select(
+                    PublicSubmissions.id,
+                    PublicSubmissions.location,
+                    PublicSubmissions.submitted_by,
+                    PublicSubmissions.mobile,
+                    PublicSubmissions.birth_marks,
+                ).where(PublicSubmissions.id.in_(case_ids[start:start + 500]))
+            )
+            for case_id, *detail in rows:
+                details[case_id] = tuple(detail)
+    return details
+
+
 def get_public_submission_basic(case_id: str):
     """
     Return basic info + status of a public submission.
 
-    Used in public app 'Check my submission'.
+    Used in public app 'Check my submission'. case_id may be the internal ID
+    or the user-facing Report ID (public_ref).
     """
-    # create_db()
     with Session(engine) as session:
         return session.exec(
             select(
@@ -225,13 +443,15 @@ def get_public_submission_basic(case_id: str):
                 PublicSubmissions.location,
                 PublicSubmissions.birth_marks,
                 PublicSubmissions.submitted_on,
-            ).where(PublicSubmissions.id == case_id)
+                PublicSubmissions.public_ref,
+            ).where(
+                or_(PublicSubmissions.id == case_id, PublicSubmissions.public_ref == case_id)
+            )
         ).first()
 
 
 def get_registered_case_detail(case_id: str):
     """Return key fields of a registered case for display."""
-    # create_db()
     with Session(engine) as session:
         result = session.exec(
             select(
@@ -251,11 +471,45 @@ def get_registered_case_detail(case_id: str):
         return result
 
 
+# case_id -> (expires_at, rows) for get_registered_case_detail_cached
+CASE_DETAIL_TTL_SECONDS = 60
+CASE_DETAIL_CACHE_SIZE = 1024
+_case_detail_cache = {}
+_case_detail_lock = threading.Lock()
+
+
+def get_registered_case_detail_cached(case_id: str):
+    """
+    get_registered_case_detail with a short in-process TTL cache, for hot
+    read paths (video upload/results) that look up the same case repeatedly.
+
+    Entries are dropped by this process's own writes; other processes (e.g.
+    the Streamlit app) can be stale for up to CASE_DETAIL_TTL_SECONDS.
+    """
+    now = time.monotonic()
+    entry = _case_detail_cache.get(case_id)
+    if entry is not None and entry[0] > now:
+        return entry[1]
+
+    result = get_registered_case_detail(case_id)
+    if result:  # don't cache misses - the case may be registered any moment
+        with _case_detail_lock:
+            if len(_case_detail_cache) >= CASE_DETAIL_CACHE_SIZE:
+                _case_detail_cache.clear()
+            _case_detail_cache[case_id] = (now + CASE_DETAIL_TTL_SECONDS, result)
+    return result
+
+
+def invalidate_case_detail(case_id: str):
+    """Drop a case from the get_registered_case_detail_cached cache."""
+    with _case_detail_lock:
+        _case_detail_cache.pop(str(case_id), None)
+
+
 def get_matched_registered_case_for_public_id(public_case_id: str):
     """
     Given a public submission ID, find the registered case that was matched with it.
     """
-    # create_db()
     with Session(engine) as session:
         return session.exec(
             select(
@@ -264,37 +518,40 @@ def get_matched_registered_case_for_public_id(public_case_id: str):
                 RegisteredCases.age,
                 RegisteredCases.last_seen,
                 RegisteredCases.birth_marks,
-            ).where(RegisteredCases.matched_with == str(public_case_id))
+            )
+            .where(RegisteredCases.matched_with == str(public_case_id))
+            .limit(1)
         ).first()
 
 
 def list_public_cases():
-    # create_db()
-    with Session(engine) as session:
-        result = session.exec(select(PublicSubmissions)).all()
-        return result
+    """Iterate over every public submission, streamed in batches."""
+    return _stream_rows(select(PublicSubmissions))
 
 
 def update_found_status(register_case_id: str, public_case_id: str):
     """
     Mark a registered case and a public submission as 'Found' and link them.
-    """
-    # create_db()
-    with Session(engine) as session:
-        registered_case_details = session.exec(
-            select(RegisteredCases).where(RegisteredCases.id == str(register_case_id))
-        ).one()
-        registered_case_details.status = "F"
-        registered_case_details.matched_with = str(public_case_id)
-
-        public_case_details = session.exec(
-            select(PublicSubmissions).where(PublicSubmissions.id == str(public_case_id))
-        ).one()
-        public_case_details.status = "F"
 
-        session.add(registered_case_details)
-        session.add(public_case_details)
-        session.commit()
+    Two UPDATEs in one transaction, without loading either row. Raises
+    NoResultFound (and changes nothing) if either ID does not exist.
+    """
+    with Session(engine) as session, session.begin():
+        updated = session.exec(
+            update(RegisteredCases)
+            .where(RegisteredCases.id == str(register_case_id))
+            .values(status="F", matched_with=str(public_case_id))
+        ).rowcount
+        updated_public = session.exec(
+            update(PublicSubmissions)
+            .where(PublicSubmissions.id == str(public_case_id))
+            .values(status="F")
+        ).rowcount
+        if not (updated and updated_public):
+            raise NoResultFound(
+                f"No case {register_case_id} / public submission {public_case_id} to mark as found"
+            )
+    invalidate_case_detail(register_case_id)
 
 
 def update_matched_with(registered_case_id: str, public_case_id: str):
@@ -302,48 +559,47 @@ def update_matched_with(registered_case_id: str, public_case_id: str):
     Update a registered case with the ID of a matching public submission.
     Does NOT change status to 'F' yet, just links them.
     """
-    with Session(engine) as session:
-        statement = select(RegisteredCases).where(RegisteredCases.id == str(registered_case_id))
-        registered_case = session.exec(statement).one_or_none()
-        
-        if registered_case:
-            old_val = registered_case.matched_with
-            registered_case.matched_with = str(public_case_id)
-            session.add(registered_case)
-            session.commit()
-            logger.info(f"[VERIFICATION] DB: Updated RegisteredCase {registered_case_id} matched_with: {old_val} -> {public_case_id}")
-        else:
-            logger.error(f"[VERIFICATION] DB: RegisteredCase {registered_case_id} NOT found for update.")
+    # rowcount rather than UPDATE ... RETURNING, which needs SQLite 3.35+
+    with engine.begin() as conn:
+        updated = conn.execute(
+            update(RegisteredCases)
+            .where(RegisteredCases.id == str(registered_case_id))
+            .values(matched_with=str(public_case_id))
+        ).rowcount
+
+    if updated:
+        logger.info(f"[VERIFICATION] DB: Updated RegisteredCase {registered_case_id} matched_with -> {public_case_id}")
+    else:
+        logger.error(f"[VERIFICATION] DB: RegisteredCase {registered_case_id} NOT found for update.")
 
 
-def get_registered_cases_count(submitted_by: str, status: str):
-    # create_db()
+def get_registered_cases_count(submitted_by: str, status: str) -> int:
+    """Number of the admin's cases in the given status (an index-only COUNT)."""
     with Session(engine) as session:
-        result = session.exec(
-            select(RegisteredCases)
+        return session.exec(
+            select(func.count())
+            .select_from(RegisteredCases)
             .where(RegisteredCases.submitted_by == submitted_by)
             .where(RegisteredCases.status == status)
-        ).all()
-        return result
+        ).one()
 
 
 def delete_registered_case(case_id: str):
     """
     Delete a registered case (admin clean-up of unwanted / test entries).
     """
-    # create_db()
     with Session(engine) as session:
         case = session.get(RegisteredCases, case_id)
         if case:
             session.delete(case)
             session.commit()
+    invalidate_case_detail(case_id)
 
 
 def delete_public_case(case_id: str):
     """
     Delete a public submission (admin clean-up of unwanted / test entries).
     """
-    # create_db()
     with Session(engine) as session:
         case = session.get(PublicSubmissions, case_id)
         if case:
@@ -351,6 +607,33 @@ def delete_public_case(case_id: str):
             session.commit()
 
 
+def bulk_delete(session, model, ids, chunk_size: int = 500):
+    """
+    DELETE ... WHERE id IN (...) for many IDs, chunked for SQLite's
+    bound-parameter limit. Runs in the caller's session; the caller commits.
+    """
+    ids = list(ids)
+    for start in range(0, len(ids), chunk_size):
+        session.exec(delete(model).where(model.id.in_(ids[start:start + chunk_size])))
+
+
+def delete_registered_cases_bulk(case_ids):
+    """Delete many registered cases with a single commit."""
+    case_ids = [str(case_id) for case_id in case_ids]
+    with Session(engine) as session:
+        bulk_delete(session, RegisteredCases, case_ids)
+        session.commit()
+    for case_id in case_ids:
+        invalidate_case_detail(case_id)
+
+
+def delete_public_cases_bulk(case_ids):
+    """Delete many public submissions with a single commit."""
+    with Session(engine) as session:
+        bulk_delete(session, PublicSubmissions, case_ids)
+        session.commit()
+
+
 # ============================================================
 # Phase 2 — Video Analysis Queries
 # ============================================================
@@ -379,24 +662,24 @@ def update_video_status(
     error_message: str = None,
     completed_at=None,
 ):
-    """Update video upload status and progress counters."""
-    with Session(engine) as session:
-        upload = session.get(VideoUploads, video_id)
-        if not upload:
-            return
-        upload.status = status
-        if processed_frames is not None:
-            upload.processed_frames = processed_frames
-        if total_frames is not None:
-            upload.total_frames = total_frames
-        if total_detections is not None:
-            upload.total_detections = total_detections
-        if error_message is not None:
-            upload.error_message = error_message
-        if completed_at is not None:
-            upload.completed_at = completed_at
-        session.add(upload)
-        session.commit()
+    """
+    Update video upload status and progress counters (those not None) with a
+    single UPDATE; a missing upload is a no-op.
+    """
+    values = {
+        "status": status,
+        "processed_frames": processed_frames,
+        "total_frames": total_frames,
+        "total_detections": total_detections,
+        "error_message": error_message,
+        "completed_at": completed_at,
+    }
+    with engine.begin() as conn:
+        conn.execute(
+            update(VideoUploads)
+            .where(VideoUploads.id == video_id)
+            .values({key: value for key, value in values.items() if value is not None})
+        )
 
 
 def save_video_detection(detection: VideoDetections):
@@ -407,42 +690,118 @@ def save_video_detection(detection: VideoDetections):
 
 
 def save_video_detections_batch(detections: list):
-    """Insert multiple video detection records in one transaction."""
+    """
+    Insert multiple video detection records in one transaction.
+
+    A single Core executemany: the rows are write-only here, so the ORM's
+    per-object unit-of-work bookkeeping is skipped.
+    """
     if not detections:
         return
-    with Session(engine) as session:
-        for det in detections:
-            session.add(det)
-        session.commit()
+    with engine.begin() as conn:
+        _insert_detections(conn, detections)
+
+
+def _insert_detections(conn, detections: list):
+    conn.execute(
+        insert(VideoDetections.__table__),
+        [det.model_dump() for det in detections],
+    )
+
+
+def save_video_progress(
+    video_id: str,
+    detections: list,
+    processed_frames: int,
+    total_detections: int,
+    status: str = "processing",
+    completed_at=None,
+):
+    """
+    Insert buffered detections and update the upload's status/progress
+    counters in one transaction - one commit per flush in the video loop
+    instead of one for the detections and another for the progress.
+    """
+    values = {
+        "status": status,
+        "processed_frames": processed_frames,
+        "total_detections": total_detections,
+    }
+    if completed_at is not None:
+        values["completed_at"] = completed_at
+    with engine.begin() as conn:
+        if detections:
+            _insert_detections(conn, detections)
+        conn.execute(
+            update(VideoUploads).where(VideoUploads.id == video_id).values(**values)
+        )
 
 
-def get_video_detections_by_case(case_id: str):
-    """Fetch all video detections for a given case, ordered by confidence descending."""
+def iter_video_detection_batches(case_id: str, batch_size: int = 500):
+    """
+    Yield lists of (id, video_id, video_location, timestamp_seconds, confidence,
+    cropped_face_path, detected_at) rows for a case, highest confidence first,
+    batch_size rows at a time. video_location comes from a join on the upload.
+    """
     with Session(engine) as session:
-        results = session.exec(
-            select(VideoDetections)
+        rows = session.exec(
+            select(
+                VideoDetections.id,
+                VideoDetections.video_id,
+                VideoUploads.video_location,
+                VideoDetections.timestamp_seconds,
+                VideoDetections.confidence,
+                VideoDetections.cropped_face_path,
+                VideoDetections.detected_at,
+            )
+            .outerjoin(VideoUploads, VideoUploads.id == VideoDetections.video_id)
             .where(VideoDetections.case_id == case_id)
             .order_by(VideoDetections.confidence.desc())
-        ).all()
-        return results
+            .execution_options(yield_per=batch_size)
+        )
+        yield from rows.partitions()
 
 
-def get_video_uploads_by_case(case_id: str):
-    """Fetch all video uploads analyzed for a given case."""
+def count_video_uploads_by_case(case_id: str) -> int:
+    """Count the video uploads analyzed for a given case."""
     with Session(engine) as session:
-        results = session.exec(
-            select(VideoUploads)
-            .where(VideoUploads.case_id == case_id)
-            .order_by(VideoUploads.uploaded_at.desc())
-        ).all()
-        return results
+        return session.exec(
+            select(func.count(VideoUploads.id)).where(VideoUploads.case_id == case_id)
+        ).one()
 
 
-def get_case_embedding(case_id: str):
-    """Fetch the face_mesh embedding for a registered case."""
+def get_case_embedding(case_id: str, status: Optional[str] = None):
+    """Fetch the face_mesh embedding for a registered case (optionally only if in status)."""
     with Session(engine) as session:
-        result = session.exec(
-            select(RegisteredCases.face_mesh)
-            .where(RegisteredCases.id == case_id)
-        ).first()
-        return result
\ No newline at end of file
+        query = select(RegisteredCases.face_mesh).where(RegisteredCases.id == case_id)
+        if status:
+            query = query.where(RegisteredCases.status == status)
+        result = session.exec(query).first()
+        return result
+
+
+def get_public_case_embedding(case_id: str, status: Optional[str] = None):
+    """Fetch the face_mesh embedding for a public submission (optionally only if in status)."""
+    with Session(engine) as session:
+        query = select(PublicSubmissions.face_mesh).where(PublicSubmissions.id == case_id)
+        if status:
+            query = query.where(PublicSubmissions.status == status)
+        result = session.exec(query).first()
+        return result
+
+
+def get_registered_case_ids(status: str) -> list:
+    """IDs of every registered case in the given status."""
+    with Session(engine) as session:
+        return list(session.exec(select(RegisteredCases.id).where(RegisteredCases.status == status)))
+
+
+def iter_registered_case_embeddings(case_ids, chunk_size: int = 500):
+    """Yield (id, face_mesh) for the given registered case IDs, one IN query per chunk."""
+    case_ids = list(case_ids)
+    with Session(engine) as session:
+        for start in range(0, len(case_ids), chunk_size):
+            yield from session.exec(
+                select(RegisteredCases.id, RegisteredCases.face_mesh)
+                .where(RegisteredCases.id.in_(case_ids[start:start + chunk_size]))
+            )
@@ -1,10 +1,11 @@
 import os
-import json
+import threading
 import traceback
 import logging
 from collections import defaultdict
 import numpy as np
 from pages.helper import db_queries
+from pages.helper.embeddings import decode_embedding
 
 # Setup logging
 # Setup logging
@@ -18,43 +19,148 @@ except ImportError:
     DEEPFACE_AVAILABLE = False
     logger.warning("DeepFace not installed. Matching will fail or return empty.")
 
+# SIMD int8 cosine kernel for USE_INT8_EMBED (optional - opt-in path only)
+try:
+    import simsimd
+    SIMSIMD_AVAILABLE = True
+except ImportError:
+    SIMSIMD_AVAILABLE = False
+
 # Configurable threshold (lower = stricter matching)
 # DeepFace ArcFace default for Cosine is ~0.68. Using 0.60 for stricter matching.
 DEFAULT_TOLERANCE = 0.60
 
+# Encodings are stored as float32; matching in float32 too halves the memory
+# swept per comparison compared to float64
+MATCH_DTYPE = np.float32
 
-def calculate_cosine_distance(encoding1, encoding2):
-    """Calculate Cosine distance between two face encodings."""
-    a = np.array(encoding1)
-    b = np.array(encoding2)
-    
-    # Avoid division by zero
-    norm_a = np.linalg.norm(a)
-    norm_b = np.linalg.norm(b)
-    if norm_a == 0 or norm_b == 0:
-        return 1.0
-        
-    return 1.0 - (np.dot(a, b) / (norm_a * norm_b))
+# Opt-in: score against int8-quantized unit vectors with SimSIMD's int8
+# cosine kernel (a quarter of the float32 bandwidth, distances within ~0.01).
+# Needs simsimd - numpy has no fast int8 matmul.
+USE_INT8_EMBED = os.getenv("USE_INT8_EMBED") == "1" and SIMSIMD_AVAILABLE
+
+
+def quantize_unit(matrix: np.ndarray) -> np.ndarray:
+    """int8 copy of unit-normalized rows (scale 127; cosine is scale-free)."""
+    return np.clip(np.round(matrix * 127), -127, 127).astype(np.int8)
+
+
+def _cosine_distances(probes: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+    """(P, N) cosine distances from unit-normalized probes to EncodingMatrix rows."""
+    if matrix.dtype == np.int8:
+        return np.array(simsimd.cdist(quantize_unit(probes), matrix, metric="cosine"), dtype=MATCH_DTYPE)
+    return 1.0 - probes @ matrix.T
+
+
+class EncodingMatrix:
+    """
+    Candidate encodings stacked per dimension (old 128-D and new 512-D rows
+    can coexist) as unit-normalized (N, D) matrices, so the cosine distances
+    from one probe to every candidate are a single matrix-vector product.
+    With USE_INT8_EMBED the matrices are stored int8-quantized.
+
+    Takes the parallel (ids, encodings) lists returned by the loaders.
+    """
+
+    def __init__(self, ids, encodings):
+        rows_by_dim = defaultdict(list)
+        for i, encoding in enumerate(encodings):
+            rows_by_dim[len(encoding)].append(i)
+        self._groups = {}
+        for dim, rows in rows_by_dim.items():
+            matrix = np.stack([encodings[i] for i in rows]).astype(MATCH_DTYPE, copy=False)
+            norms = np.linalg.norm(matrix, axis=1)
+            nonzero = norms > 0
+            matrix[nonzero] /= norms[nonzero, None]
+            if USE_INT8_EMBED:
+                matrix = quantize_unit(matrix)
+            self._groups[dim] = ([ids[i] for i in rows], matrix, nonzero)
+
+    def distances(self, encoding):
+        """
+        Return (ids, distances) for every candidate with the same dimension as
+        encoding. Zero vectors get distance 1.0.
+        """
+        group = self._groups.get(len(encoding))
+        if group is None:
+            return [], np.empty(0)
+        ids, matrix, nonzero = group
+        probe = np.asarray(encoding, dtype=MATCH_DTYPE)
+        norm = np.linalg.norm(probe)
+        if norm == 0:
+            return ids, np.ones(len(ids))
+        return ids, np.where(nonzero, _cosine_distances((probe / norm)[None, :], matrix)[0], 1.0)
+
+    def closest(self, encoding):
+        """Return (best_id, distance), or (None, 100.0) if there is no candidate."""
+        ids, distances = self.distances(encoding)
+        if not len(ids):
+            return None, 100.0
+        best = int(np.argmin(distances))
+        return ids[best], float(distances[best])
+
+    def closest_many(self, encodings, probe_block: int = 256, candidate_block: int = 1024):
+        """
+        closest() for many probes at once. Probes are grouped by dimension and
+        scored in probe_block x candidate_block tiles, one matrix product per
+        tile, keeping a running argmin so the full probes x candidates
+        distance matrix is never materialized.
+        Returns [(best_id, distance)] in the order of encodings.
+        """
+        results = [(None, 100.0)] * len(encodings)
+        rows_by_dim = defaultdict(list)
+        for i, encoding in enumerate(encodings):
+            rows_by_dim[len(encoding)].append(i)
+
+        for dim, rows in rows_by_dim.items():
+            group = self._groups.get(dim)
+            if group is None:
+                continue
+            ids, matrix, nonzero = group
+            for start in range(0, len(rows), probe_block):
+                block = rows[start:start + probe_block]
+                probes = np.stack([encodings[i] for i in block]).astype(MATCH_DTYPE, copy=False)
+                norms = np.linalg.norm(probes, axis=1)
+                probe_nonzero = norms > 0
+                probes[probe_nonzero] /= norms[probe_nonzero, None]
+                block_rows = np.arange(len(block))
+                best = np.zeros(len(block), dtype=np.intp)
+                best_distances = np.full(len(block), np.inf, dtype=MATCH_DTYPE)
+                for col in range(0, len(ids), candidate_block):
+                    distances = _cosine_distances(probes, matrix[col:col + candidate_block])
+                    # Zero vectors on either side get distance 1.0, as in distances()
+                    distances[:, ~nonzero[col:col + candidate_block]] = 1.0
+                    distances[~probe_nonzero] = 1.0
+                    local = distances.argmin(axis=1)
+                    local_distances = distances[block_rows, local]
+                    # Strict < keeps the first minimum on ties, like argmin
+                    better = local_distances < best_distances
+                    best[better] = local[better] + col
+                    best_distances[better] = local_distances[better]
+                for i, b, distance in zip(block, best, best_distances):
+                    results[i] = (ids[b], float(distance))
+        return results
 
 
 def get_public_cases_data(status="NF"):
-    """Fetch public submissions with face encodings."""
+    """
+    Fetch public submissions with face encodings as parallel (ids, encodings)
+    lists, or None if there are none.
+    """
     try:
-        result = db_queries.fetch_public_cases(train_data=True, status=status)
-        if not result:
-            return None
-        
-        data = []
-        for case_id, face_mesh_json in result:
-            try:
-                encoding = json.loads(face_mesh_json)
-                if encoding and len(encoding) > 0:
-                    data.append({"id": case_id, "encoding": np.array(encoding)})
-            except (json.JSONDecodeError, TypeError) as e:
+        ids, encodings = [], []
+        for case_id, face_mesh in db_queries.fetch_public_cases(train_data=True, status=status):
+            encoding = decode_embedding(face_mesh)
+            if encoding is None:
                 logger.warning(f"Skipping public case {case_id}: invalid encoding")
                 continue
+            if not encoding.any():
+                # Placeholder (all zeros) - never matchable, keep it out of the matrices
+                continue
+            ids.append(case_id)
+            encodings.append(encoding)
         
-        return data if data else None
+        return (ids, encodings) if ids else None
         
     except Exception as e:
         logger.error(f"Error fetching public cases: {e}")
@@ -62,35 +168,69 @@ def get_public_cases_data(status="NF"):
         return None
 
 
+# case_id -> decoded encoding, for get_registered_cases_data. A registered
+# case's face_mesh is written once, at registration, so an entry stays valid
+# for as long as its ID is still in the queried status.
+_registered_encodings = {}
+_registered_encodings_lock = threading.Lock()
+
+
+def _decode_registered_rows(rows, encodings_by_id):
+    """
+    Decode (id, face_mesh) rows into encodings_by_id. Invalid and placeholder
+    encodings are stored as None, so the cache remembers them as skipped
+    instead of refetching them on every call.
+    """
+    for case_id, face_mesh in rows:
+        encoding = decode_embedding(face_mesh)
+        if encoding is None:
+            logger.warning(f"Skipping registered case {case_id}: invalid encoding")
+        elif not encoding.any():
+            # Placeholder (all zeros) - never matchable, keep it out of the matrices
+            encoding = None
+        encodings_by_id[case_id] = encoding
+
+
 def get_registered_cases_data(status="NF"):
-    """Fetch registered cases with face encodings."""
+    """
+    Fetch registered cases with face encodings as parallel (ids, encodings)
+    lists, or None if there are none.
+
+    Encodings are cached in-process: each call reads the status's ID list and
+    fetches and decodes face_mesh only for IDs not seen before (skipped
+    invalid/placeholder rows are cached too, as None).
+    """
     try:
         from pages.helper.db_queries import engine
         from pages.helper.data_models import RegisteredCases
         from sqlmodel import Session, select
-        
-        with Session(engine) as session:
-            query = select(
-                RegisteredCases.id,
-                RegisteredCases.face_mesh,
-            ).where(RegisteredCases.status == status)
-            
-            result = session.exec(query).all()
-        
-        if not result:
-            return None
-        
-        data = []
-        for case_id, face_mesh_json in result:
-            try:
-                encoding = json.loads(face_mesh_json)
-                if encoding and len(encoding) > 0:
-                    data.append({"id": case_id, "encoding": np.array(encoding)})
-            except (json.JSONDecodeError, TypeError) as e:
-                logger.warning(f"Skipping registered case {case_id}: invalid encoding")
-                continue
-        
-        return data if data else None
+
+        ids = db_queries.get_registered_case_ids(status)
+        with _registered_encodings_lock:
+            cached = {case_id: _registered_encodings[case_id] for case_id in ids if case_id in _registered_encodings}
+        missing = [case_id for case_id in ids if case_id not in cached]
+
+        if len(missing) > len(ids) // 2:
+            # Cold cache: one streaming scan beats many IN queries
+            with Session(engine) as session:
+                query = select(
+                    RegisteredCases.id,
+                    RegisteredCases.face_mesh,
+                ).where(RegisteredCases.status == status)
+
+                # Decode batch by batch rather than holding every raw blob at once
+                rows = session.exec(query.execution_options(yield_per=db_queries.STREAM_BATCH_SIZE))
+                _decode_registered_rows(rows, cached)
+        elif missing:
+            _decode_registered_rows(db_queries.iter_registered_case_embeddings(missing), cached)
+
+        with _registered_encodings_lock:
+            # Keep only this status's current cases (found/deleted ones drop out)
+            _registered_encodings.clear()
+            _registered_encodings.update(cached)
+
+        ids = [case_id for case_id, encoding in cached.items() if encoding is not None]
+        return (ids, [cached[case_id] for case_id in ids]) if ids else None
         
     except Exception as e:
         logger.error(f"Error fetching registered cases: {e}")
@@ -119,44 +259,23 @@ def match(tolerance: float = DEFAULT_TOLERANCE):
     if public_cases is None or registered_cases is None:
         return {"status": False, "message": "No data available for matching"}
     
-    if len(public_cases) == 0:
+    pub_ids, pub_encodings = public_cases
+    if len(pub_ids) == 0:
         return {"status": False, "message": "No public submissions to match"}
     
-    if len(registered_cases) == 0:
+    if len(registered_cases[0]) == 0:
         return {"status": False, "message": "No registered cases to match against"}
     
-    # Compare each public submission against all registered cases
-    for pub_case in public_cases:
-        pub_id = pub_case["id"]
-        pub_encoding = pub_case["encoding"]
-        
-        # Skip if encoding is placeholder (all zeros)
-        if np.sum(pub_encoding) == 0:
-            continue
-            
-        best_match_id = None
-        min_distance = 100.0
-        
-        for reg_case in registered_cases:
-            reg_id = reg_case["id"]
-            reg_encoding = reg_case["encoding"]
-            
-            # Skip if encoding is placeholder
-            if np.sum(reg_encoding) == 0:
-                continue
-                
-            # Skip if dimensions mismatch (e.g. old 128 vs new 512)
-            if len(reg_encoding) != len(pub_encoding):
-                continue
-                
-            try:
-                dist = calculate_cosine_distance(pub_encoding, reg_encoding)
-                if dist < min_distance:
-                    min_distance = dist
-                    best_match_id = reg_id
-            except Exception:
-                continue
-        
+    # Stack registered encodings once (the loaders already drop placeholder
+    # encodings); candidates of a different dimension (e.g. old 128 vs new
+    # 512) are never compared
+    registry = EncodingMatrix(*registered_cases)
+
+    # Score every public submission against all registered cases in one
+    # batched product
+    closest = registry.closest_many(pub_encodings)
+
+    for pub_id, (best_match_id, min_distance) in zip(pub_ids, closest):
         if best_match_id and min_distance <= tolerance:
             logger.info(f"MATCH: Public {pub_id} -> Registered {best_match_id} (Dist: {min_distance:.4f})")
             
@@ -182,6 +301,22 @@ def match(tolerance: float = DEFAULT_TOLERANCE):
     return {"status": True, "result": dict(matched_images)}
 
 
+def _load_target(case_id, face_mesh):
+    """
+    Decode the target case's stored embedding for match_one_against_all.
+
+    Returns {} if the case does not exist (face_mesh is None) and None if its
+    encoding is invalid or a zero vector.
+    """
+    if face_mesh is None:
+        return {}
+    encoding = decode_embedding(face_mesh)
+    if encoding is None or not encoding.any():
+        logger.error("[VERIFICATION] Triggered with ZERO VECTOR encoding!")
+        return None
+    return {"id": case_id, "encoding": encoding}
+
+
 def match_one_against_all(case_id: str, case_type: str = "public", tolerance: float = DEFAULT_TOLERANCE):
     """
     Efficiently match a SINGLE new case against all existing cases of the opposite type.
@@ -203,47 +338,32 @@ def match_one_against_all(case_id: str, case_type: str = "public", tolerance: fl
     # 1. Fetch the Target Case and Candidates
     logger.info(f"[VERIFICATION] Fetching target case context...")
     if case_type == "public":
-        # Fetch the single public case
-        raw_public = db_queries.fetch_public_cases(train_data=True, status="NF")
-        # Filter manually because db_queries doesn't have fetch_one_public
-        for pid, mesh, *_ in raw_public:
-            if pid == case_id:
-                try:
-                    encoding = json.loads(mesh)
-                    if not encoding or np.sum(encoding) == 0:
-                        logger.error("[VERIFICATION] Triggered with ZERO VECTOR encoding!")
-                        return {"status": False, "message": "Invalid/Zero encoding"}
-                    target_case = {"id": pid, "encoding": np.array(encoding)}
-                    logger.info(f"[VERIFICATION] Found Target Public Case: {pid} (Encoding Len: {len(target_case['encoding'])})")
-                    break
-                except:
-                    pass
-        
+        # Fetch only the target's embedding by primary key
+        target_case = _load_target(case_id, db_queries.get_public_case_embedding(case_id, status="NF"))
+        if target_case is None:
+            return {"status": False, "message": "Invalid/Zero encoding"}
         if not target_case:
             logger.error("[VERIFICATION] Target case NOT found in DB.")
             return {"status": False, "message": "Case not found"}
+        logger.info(f"[VERIFICATION] Found Target Public Case: {case_id} (Encoding Len: {len(target_case['encoding'])})")
             
         # Fetch ALL registered cases as candidates
         candidates = get_registered_cases_data()
-        logger.info(f"[VERIFICATION] Fetched {len(candidates) if candidates else 0} Registered Cases as candidates.")
+        logger.info(f"[VERIFICATION] Fetched {len(candidates[0]) if candidates else 0} Registered Cases as candidates.")
 
     elif case_type == "registered":
-        # Fetch the single registered case
-        all_reg = get_registered_cases_data()
-        if all_reg:
-            for rc in all_reg:
-                if rc["id"] == case_id:
-                    target_case = rc
-                    logger.info(f"[VERIFICATION] Found Target Registered Case: {case_id} (Encoding Len: {len(target_case['encoding'])})")
-                    break
-        
+        # Fetch only the target's embedding by primary key
+        target_case = _load_target(case_id, db_queries.get_case_embedding(case_id, status="NF"))
+        if target_case is None:
+            return {"status": False, "message": "Invalid/Zero encoding"}
         if not target_case:
             logger.error("[VERIFICATION] Target case NOT found in DB.")
             return {"status": False, "message": "Case not found"}
+        logger.info(f"[VERIFICATION] Found Target Registered Case: {case_id} (Encoding Len: {len(target_case['encoding'])})")
             
         # Fetch ALL public cases as candidates
         candidates = get_public_cases_data()
-        logger.info(f"[VERIFICATION] Fetched {len(candidates) if candidates else 0} Public Cases as candidates.")
+        logger.info(f"[VERIFICATION] Fetched {len(candidates[0]) if candidates else 0} Public Cases as candidates.")
     
     else:
         return {"status": False, "message": "Invalid case_type"}
@@ -253,30 +373,19 @@ def match_one_against_all(case_id: str, case_type: str = "public", tolerance: fl
         return {"status": True, "result": {}}
 
     # 2. Run Comparison (O(N))
-    logger.info(f"--- [VERIFICATION] STEP 2: Comparing against {len(candidates)} candidates ---")
-    best_match_id = None
-    min_distance = 100.0
-    
+    logger.info(f"--- [VERIFICATION] STEP 2: Comparing against {len(candidates[0])} candidates ---")
     target_encoding = target_case["encoding"]
-    
-    for candidate in candidates:
-        cand_id = candidate["id"]
-        cand_encoding = candidate["encoding"]
-        
-        if len(cand_encoding) != len(target_encoding):
-            continue
-            
-        try:
-            dist = calculate_cosine_distance(target_encoding, cand_encoding)
-            # Log some distances to verify logic
-            if dist < 0.8: 
-                 logger.info(f"[VERIFICATION] Distance Check: {case_id} vs {cand_id} = {dist:.4f}")
-
-            if dist < min_distance:
-                min_distance = dist
-                best_match_id = cand_id
-        except Exception:
-            continue
+    # One matrix-vector product scores every candidate; reuse it for both
+    # the debug log and the best match
+    cand_ids, distances = EncodingMatrix(*candidates).distances(target_encoding)
+    # Log some distances to verify logic
+    for i in np.flatnonzero(distances < 0.8):
+        logger.info(f"[VERIFICATION] Distance Check: {case_id} vs {cand_ids[i]} = {distances[i]:.4f}")
+    if len(cand_ids):
+        best = int(np.argmin(distances))
+        best_match_id, min_distance = cand_ids[best], float(distances[best])
+    else:
+        best_match_id, min_distance = None, 100.0
     
     logger.info(f"[VERIFICATION] STEP 5 SANITY: Best Distance = {min_distance:.4f} (Threshold: {tolerance})")
 
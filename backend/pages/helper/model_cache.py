@@ -0,0 +1,61 @@
+"""
+Process-wide DeepFace model cache.
+
+DeepFace builds the ArcFace recognizer and the RetinaFace detector lazily
+on the first represent() call, which costs several seconds of weight
+loading. get_model() builds the recognizer once per process and warm_up()
+also pushes one dummy image through the detector, so the first real
+upload doesn't pay for either.
+"""
+
+import logging
+import threading
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = "ArcFace"
+DETECTOR_BACKEND = "retinaface"
+
+_lock = threading.Lock()
+_models = {}
+_warmed = False
+
+
+def get_model(model_name: str = MODEL_NAME):
+    """Return the built DeepFace recognition model, building it on first use."""
+    with _lock:
+        model = _models.get(model_name)
+        if model is None:
+            from deepface import DeepFace
+            model = DeepFace.build_model(model_name)
+            _models[model_name] = model
+            logger.info(f"[MODEL] Built {model_name}")
+        return model
+
+
+def warm_up() -> bool:
+    """Load recognizer + detector weights. Returns False if DeepFace is unavailable."""
+    global _warmed
+    if _warmed:
+        return True
+    try:
+        from deepface import DeepFace
+
+        get_model()
+        DeepFace.represent(
+            img_path=np.zeros((112, 112, 3), dtype=np.uint8),
+            model_name=MODEL_NAME,
+            detector_backend=DETECTOR_BACKEND,
+            enforce_detection=False,
+        )
+        _warmed = True
+        logger.info("[MODEL] DeepFace models warmed up")
+        return True
+    except ImportError:
+        logger.warning("[MODEL] DeepFace not installed; skipping warm-up")
+        return False
+    except Exception as e:
+        logger.warning(f"[MODEL] DeepFace warm-up failed: {e}")
+        return False
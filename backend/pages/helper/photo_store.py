@@ -0,0 +1,43 @@
+"""
+Re-encoding of stored case / sighting photos.
+
+./resources/*.jpg is read by every listing render and served by /resources.
+Phone photos arrive at 4 MP+ with EXIF and embedded thumbnails; once the face
+encoding has been extracted from the upload, the stored copy only needs to be
+display-sized, so it is rewritten as a capped, progressive JPEG without
+metadata.
+"""
+
+import logging
+import os
+
+import PIL.Image
+import PIL.ImageOps
+
+logger = logging.getLogger(__name__)
+
+# Same cap the face extractors apply before detection
+MAX_STORED_SIDE = 1024
+JPEG_QUALITY = 82
+
+
+def compact_image_file(path: str) -> None:
+    """
+    Rewrite a saved photo in place as a JPEG no larger than MAX_STORED_SIDE,
+    with EXIF stripped (its orientation is applied to the pixels first).
+
+    Call this after face extraction. On failure the original file is left as-is.
+    """
+    tmp_path = path + ".tmp"
+    try:
+        with PIL.Image.open(path) as image:
+            # Let the JPEG decoder downscale while decoding when it can
+            image.draft("RGB", (MAX_STORED_SIDE, MAX_STORED_SIDE))
+            image = PIL.ImageOps.exif_transpose(image).convert("RGB")
+        image.thumbnail((MAX_STORED_SIDE, MAX_STORED_SIDE), PIL.Image.LANCZOS)
+        image.save(tmp_path, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        logger.warning(f"Could not re-encode {path}: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
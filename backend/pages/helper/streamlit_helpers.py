@@ -1,6 +1,53 @@
-import streamlit as st
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
 from functools import wraps
 
+import streamlit as st
+
+from pages.helper import model_cache
+
+
+# Base URL of the FastAPI server (e.g. http://localhost:8000). When set, case
+# photos are rendered from its cached /resources mount: the browser fetches
+# and caches each image instead of Streamlit re-sending it on every rerun.
+MEDIA_BASE_URL = os.getenv("REUNITE_MEDIA_URL", "").rstrip("/")
+
+
+def case_image_source(case_id: str) -> str:
+    """URL (or local path, without REUNITE_MEDIA_URL) of a case/submission photo for st.image."""
+    if MEDIA_BASE_URL:
+        return f"{MEDIA_BASE_URL}/resources/{case_id}.jpg"
+    return "./resources/" + case_id + ".jpg"
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def available_images() -> frozenset:
+    """
+    Filenames in ./resources, listed once and shared by the case viewers
+    instead of an open() (or a caught exception) per photo. Pages that add or
+    remove photos call available_images.clear().
+    """
+    try:
+        return frozenset(os.listdir("./resources"))
+    except OSError:
+        return frozenset()
+
+
+# Partial reruns: widgets inside a fragment rerun only that fragment, not the
+# whole page (st.fragment from Streamlit 1.37, experimental_ before that).
+fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", lambda func: func)
+
+
+def stop_unless_logged_in():
+    """
+    Page-level gate: for a logged-out user, show the notice and st.stop() so
+    nothing below it (widgets, DB queries) runs on that rerun.
+    """
+    if not st.session_state.get("login_status"):
+        st.write("You need to be logged in as admin to use this page.")
+        st.stop()
+
 
 def require_login(func):
     """Decorator to require login for Streamlit pages."""
@@ -28,3 +75,20 @@ def show_error(message: str):
 
 def show_warning(message: str):
     st.warning(message)
+
+
+@st.cache_resource
+def get_encoding_pool() -> ProcessPoolExecutor:
+    """
+    Process pool for face-encoding uploads, shared across sessions and reruns.
+
+    Each worker loads ArcFace/RetinaFace once, and extraction runs off the
+    script thread so the page can keep rendering while it works.
+    """
+    return ProcessPoolExecutor(
+        max_workers=min(2, os.cpu_count() or 1),
+        # spawn: TensorFlow state doesn't survive a fork
+        mp_context=multiprocessing.get_context("spawn"),
+        # Build the models as each worker starts, not on the first upload
+        initializer=model_cache.warm_up,
+    )
@@ -1,7 +1,7 @@
 import os
-import json
 import logging
 from pages.helper import db_queries
+from pages.helper.embeddings import decode_embedding
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 def get_train_data(submitted_by: str):
@@ -15,14 +15,11 @@ def get_train_data(submitted_by: str):
             return None, None
         
         valid_cases = 0
-        for case_id, face_mesh_json in result:
-            try:
-                encoding = json.loads(face_mesh_json)
-                if encoding and len(encoding) > 0:
-                    valid_cases += 1
-            except (json.JSONDecodeError, TypeError):
+        for case_id, face_mesh in result:
+            if decode_embedding(face_mesh) is not None:
+                valid_cases += 1
+            else:
                 logger.warning(f"Invalid encoding for case {case_id}")
-                continue
         
         return valid_cases, None
         
@@ -1,7 +1,9 @@
-import PIL
+import PIL.Image
 import numpy as np
 import logging
 
+from pages.helper import model_cache
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -25,6 +27,32 @@ def image_obj_to_numpy(image_obj) -> np.ndarray:
     return np.array(image)
 
 
+# Photos are capped to this size before detection - RetinaFace gains
+# nothing from a 12 MP phone photo (same cap as api/face_extract.py)
+MAX_IMAGE_SIDE = 1024
+
+
+def load_image_file(path: str) -> np.ndarray:
+    """Decode an image file into an RGB array no larger than MAX_IMAGE_SIDE."""
+    with PIL.Image.open(path) as image:
+        # Let the JPEG decoder downscale while decoding when it can
+        image.draft("RGB", (MAX_IMAGE_SIDE, MAX_IMAGE_SIDE))
+        image = image.convert("RGB")
+    image.thumbnail((MAX_IMAGE_SIDE, MAX_IMAGE_SIDE))
+    return np.asarray(image)
+
+
+def encode_image_file(path: str):
+    """
+    Decode a saved photo and extract its face encoding in one call.
+
+    Module-level and path-based so it can be submitted to a process pool (see
+    streamlit_helpers.get_encoding_pool) without pickling the image bytes;
+    returns extract_face_encoding's result.
+    """
+    return extract_face_encoding(load_image_file(path))
+
+
 def extract_face_encoding(image: np.ndarray):
     """
     Extract face encoding using DeepFace (ArcFace model).
@@ -41,8 +69,8 @@ def extract_face_encoding(image: np.ndarray):
         # Enforce detection to ensure a face exists
         embedding_objs = DeepFace.represent(
             img_path=image,
-            model_name="ArcFace",
-            detector_backend="retinaface",
+            model_name=model_cache.MODEL_NAME,
+            detector_backend=model_cache.DETECTOR_BACKEND,
             enforce_detection=True,
             align=True
         )
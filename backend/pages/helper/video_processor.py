@@ -15,7 +15,8 @@ Designed for:
 """
 
 import os
-import json
+import queue
+import threading
 import uuid
 import logging
 import traceback
@@ -27,6 +28,7 @@ import PIL.Image
 
 from pages.helper import db_queries
 from pages.helper.data_models import VideoDetections
+from pages.helper.embeddings import decode_embedding
 
 # ---------------------------------------------------------------------------
 # Logging
@@ -41,8 +43,18 @@ TARGET_MAX_WIDTH = 1280            # Max width (only downscale, never upscale)
 TARGET_MAX_HEIGHT = 720            # Max height
 DEFAULT_CONFIDENCE_THRESHOLD = 0.85  # Cosine distance threshold (relaxed for CCTV conditions)
 PROGRESS_UPDATE_INTERVAL = 10     # Update DB progress every N frames
+FRAME_PREFETCH = 8                # Frames decoded ahead of detection by the reader thread
+WRITE_QUEUE_SIZE = 64             # Crop / progress writes queued for the writer thread
+FRAME_SIGNATURE_SIZE = (32, 18)   # Area-averaged grayscale thumbnail used to spot unchanged frames
+STATIC_FRAME_MAX_DIFF = 6         # Max per-cell gray change for a frame to count as unchanged
+FALLBACK_THUMB_MAX_SIDE = 160     # Longest side of the frame thumbnail saved when a face box can't be cropped
 MAX_VIDEO_SIZE_BYTES = 2 * 1024 * 1024 * 1024  # 2 GB
 
+# Optional early stop (off unless set): end a job after this many detections,
+# or at the first detection at or under this cosine distance
+VIDEO_MAX_DETECTIONS = int(os.getenv("VIDEO_MAX_DETECTIONS", "0")) or None
+VIDEO_EARLY_STOP_DISTANCE = float(os.getenv("VIDEO_EARLY_STOP_DISTANCE", "0")) or None
+
 # Directories
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 VIDEO_UPLOADS_DIR = os.path.join(BASE_DIR, "video_uploads")
@@ -122,20 +134,15 @@ def _ensure_deepface():
 # Core helpers
 # ---------------------------------------------------------------------------
 
-def _cosine_distance(a, b):
-    """Cosine distance between two vectors. Returns 0.0 (identical) to 2.0."""
-    a = np.asarray(a, dtype=np.float64)
-    b = np.asarray(b, dtype=np.float64)
-    norm_a = np.linalg.norm(a)
-    norm_b = np.linalg.norm(b)
-    if norm_a == 0 or norm_b == 0:
-        return 1.0
-    return 1.0 - (np.dot(a, b) / (norm_a * norm_b))
+def _is_no_face_error(error):
+    """True for DeepFace's enforce_detection "Face could not be detected" error."""
+    return isinstance(error, ValueError) and "could not be detected" in str(error)
 
 
 def _detect_and_embed(frame_rgb):
     """
-    Detect faces in a frame and return list of (embedding, facial_area).
+    Detect faces in a frame and return list of (embedding, facial_area),
+    with each embedding as a float32 array.
 
     Uses a multi-strategy approach for robustness with CCTV footage:
     1. Try enforce_detection=True first (only real detected faces)
@@ -143,6 +150,10 @@ def _detect_and_embed(frame_rgb):
     3. Try both RetinaFace and OpenCV backends
     4. Skip alignment if aligned version fails (handles missing landmarks)
 
+    The no-align retry is skipped for a detector that found no face at all:
+    alignment runs after detection, so the retry would only repeat the same
+    detection pass.
+
     Each facial_area is a dict with keys: x, y, w, h.
     """
     from deepface import DeepFace
@@ -162,7 +173,12 @@ def _detect_and_embed(frame_rgb):
         ("opencv", False, False, "opencv-noenforce-noalign"),
     ]
 
+    # Detectors that found no face in this frame (with enforce_detection=True)
+    no_face_detectors = set()
+
     for detector, enforce, align, label in strategies:
+        if enforce and detector in no_face_detectors:
+            continue
         try:
             results = DeepFace.represent(
                 img_path=frame_rgb,
@@ -171,8 +187,10 @@ def _detect_and_embed(frame_rgb):
                 enforce_detection=enforce,
                 align=align,
             )
-        except Exception:
+        except Exception as e:
             # enforce_detection=True raises when no face found — that's expected
+            if _is_no_face_error(e):
+                no_face_detectors.add(detector)
             continue
 
         if not results:
@@ -185,7 +203,7 @@ def _detect_and_embed(frame_rgb):
             if not embedding or len(embedding) == 0:
                 continue
 
-            emb_arr = np.array(embedding, dtype=np.float64)
+            emb_arr = np.asarray(embedding, dtype=np.float32)
 
             # Quality check: skip garbage embeddings (near-zero norm)
             norm = np.linalg.norm(emb_arr)
@@ -198,7 +216,7 @@ def _detect_and_embed(frame_rgb):
             if face_w > 0 and face_h > 0 and (face_w < 15 or face_h < 15):
                 continue
 
-            faces.append((embedding, facial_area))
+            faces.append((emb_arr, facial_area))
 
         # If this strategy found valid faces, use them
         if faces:
@@ -208,8 +226,14 @@ def _detect_and_embed(frame_rgb):
     return faces
 
 
-def _crop_face(frame_rgb, facial_area, padding=20):
-    """Crop a face region from the frame with padding."""
+def _crop_face(frame_rgb, facial_area, padding=20, full_bgr=None):
+    """
+    Crop a face region from the frame with padding.
+
+    facial_area is in frame_rgb coordinates. If full_bgr (the decoded frame
+    before downscaling) is given, the box is mapped onto it and the crop is
+    taken from there at source resolution, returned as RGB like the rest.
+    """
     h, w = frame_rgb.shape[:2]
     x = max(0, facial_area.get("x", 0) - padding)
     y = max(0, facial_area.get("y", 0) - padding)
@@ -219,18 +243,139 @@ def _crop_face(frame_rgb, facial_area, padding=20):
     if x2 <= x or y2 <= y:
         return None
 
+    if full_bgr is not None:
+        sy = full_bgr.shape[0] / h
+        sx = full_bgr.shape[1] / w
+        cropped = full_bgr[int(y * sy):int(round(y2 * sy)), int(x * sx):int(round(x2 * sx))]
+        return cv2.cvtColor(cropped, cv2.COLOR_BGR2RGB)
+
     cropped = frame_rgb[y:y2, x:x2]
     return cropped
 
 
+def _frame_thumbnail(frame_rgb):
+    """Small copy of the whole frame, saved in place of a face crop that came out empty."""
+    h, w = frame_rgb.shape[:2]
+    scale = FALLBACK_THUMB_MAX_SIDE / max(h, w)
+    if scale >= 1:
+        return frame_rgb
+    size = (max(1, int(w * scale)), max(1, int(h * scale)))
+    return cv2.resize(frame_rgb, size, interpolation=cv2.INTER_AREA)
+
+
+def _cropped_face_path(detection_id):
+    """Relative path (under resources/) of a detection's cropped face image."""
+    return f"video_detections/{detection_id}.jpg"
+
+
 def _save_cropped_face(cropped_rgb, detection_id):
     """Save a cropped face image as JPEG. Returns the relative path."""
-    filename = f"{detection_id}.jpg"
-    filepath = os.path.join(DETECTIONS_DIR, filename)
+    filepath = os.path.join(DETECTIONS_DIR, f"{detection_id}.jpg")
     # Convert RGB to BGR for OpenCV saving
     cropped_bgr = cv2.cvtColor(cropped_rgb, cv2.COLOR_RGB2BGR)
     cv2.imwrite(filepath, cropped_bgr, [cv2.IMWRITE_JPEG_QUALITY, 90])
-    return f"video_detections/{filename}"
+    return _cropped_face_path(detection_id)
+
+
+def _frame_signature(frame_rgb):
+    """Small area-averaged grayscale thumbnail of a frame (int16, ready to subtract)."""
+    gray = cv2.cvtColor(frame_rgb, cv2.COLOR_RGB2GRAY)
+    return cv2.resize(gray, FRAME_SIGNATURE_SIZE, interpolation=cv2.INTER_AREA).astype(np.int16)
+
+
+def _prepare_frame(frame_bgr):
+    """
+    Downscale a decoded frame to the target size (never upscale) and convert
+    it to RGB. Returns (frame_rgb, full_bgr): full_bgr is the original frame
+    if it was downscaled (face crops are taken from it), else None.
+    """
+    # Resize only if frame is larger than max (preserve quality for CCTV)
+    full_bgr = None
+    h_orig, w_orig = frame_bgr.shape[:2]
+    if w_orig > TARGET_MAX_WIDTH or h_orig > TARGET_MAX_HEIGHT:
+        scale = min(TARGET_MAX_WIDTH / w_orig, TARGET_MAX_HEIGHT / h_orig)
+        new_w = int(w_orig * scale)
+        new_h = int(h_orig * scale)
+        full_bgr = frame_bgr
+        frame_bgr = cv2.resize(frame_bgr, (new_w, new_h))
+
+    # Convert BGR -> RGB for DeepFace
+    return cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB), full_bgr
+
+
+# ---------------------------------------------------------------------------
+# Decode / write pipeline
+# ---------------------------------------------------------------------------
+# process_video runs three stages: a reader thread decodes frames, the calling
+# thread runs DeepFace (kept on one thread for TF's sake) and matching, and a
+# writer thread saves crops and DB progress. OpenCV releases the GIL while
+# decoding and encoding, so decode and writes overlap with inference.
+
+def _put(q, item, stop):
+    """q.put that gives up once stop is set (the consumer has gone away)."""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.5)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _read_frames(cap, step, fps, frames, stop):
+    """
+    Reader thread: decode the video sequentially and queue every step-th frame
+    as (frame_idx, timestamp_sec, frame_rgb, full_bgr) (see _prepare_frame),
+    frame_rgb being None if it failed to decode. Ends with None, or with the exception that stopped it.
+
+    Sequential rather than seeking to each timestamp: a seek restarts decoding
+    at the previous keyframe (seconds back in CCTV H.264). grab() advances
+    without converting; only kept frames are retrieve()d.
+    """
+    try:
+        frame_pos = -1
+        frame_idx = -1
+        while not stop.is_set() and cap.grab():
+            frame_pos += 1
+            if frame_pos % step:
+                continue
+            frame_idx += 1
+            ret, frame_bgr = cap.retrieve()
+            frame_rgb, full_bgr = _prepare_frame(frame_bgr) if ret and frame_bgr is not None else (None, None)
+            if not _put(frames, (frame_idx, frame_pos / fps, frame_rgb, full_bgr), stop):
+                return
+        _put(frames, None, stop)
+    except Exception as e:
+        _put(frames, e, stop)
+
+
+def _write_results(video_id, writes, errors):
+    """
+    Writer thread: perform queued writes in order until None -
+    ("crop", detection_id, image_rgb) saves a face crop, ("progress",
+    detections, processed, detection_count) flushes detections and progress.
+    Queue order means a detection row is never written before its crop.
+    The first failure is appended to errors; later items are drained unwritten.
+    """
+    while True:
+        item = writes.get()
+        if item is None:
+            return
+        if errors:
+            continue
+        try:
+            if item[0] == "crop":
+                _save_cropped_face(item[2], item[1])
+            else:
+                _, detections, processed, detection_count = item
+                db_queries.save_video_progress(
+                    video_id,
+                    detections,
+                    processed_frames=processed,
+                    total_detections=detection_count,
+                )
+        except Exception as e:
+            errors.append(e)
 
 
 # ---------------------------------------------------------------------------
@@ -273,7 +418,11 @@ def validate_video_file(file_path):
 # Main Processing Pipeline
 # ---------------------------------------------------------------------------
 
-def process_video(video_id: str):
+def process_video(
+    video_id: str,
+    max_detections: int = VIDEO_MAX_DETECTIONS,
+    early_stop_distance: float = VIDEO_EARLY_STOP_DISTANCE,
+):
     """
     Main entry point for background video processing.
 
@@ -283,6 +432,11 @@ def process_video(video_id: str):
     4. Detects faces and generates embeddings
     5. Matches against the target case
     6. Saves detections to the database
+
+    The rest of the video is skipped once max_detections detections are
+    found, or after a detection at distance <= early_stop_distance (both
+    None = scan the whole video). The frame with the stopping detection is
+    finished first, so all its matches are kept.
     """
     logger.info(f"[VIDEO] ========== Starting processing for video {video_id} ==========")
 
@@ -302,17 +456,23 @@ def process_video(video_id: str):
     cap = None
     try:
         # ---- Load target case embedding ----
-        face_mesh_json = db_queries.get_case_embedding(case_id)
-        if not face_mesh_json:
+        face_mesh = db_queries.get_case_embedding(case_id)
+        if not face_mesh:
             raise ValueError(f"Case {case_id} has no face embedding in the database")
 
-        target_embedding = json.loads(face_mesh_json)
-        if not target_embedding or len(target_embedding) == 0:
+        target_embedding = decode_embedding(face_mesh)
+        if target_embedding is None:
             raise ValueError(f"Case {case_id} has an empty/invalid face embedding")
 
-        target_embedding = np.array(target_embedding, dtype=np.float64)
         logger.info(f"[VIDEO] Target embedding loaded: case={case_id}, dim={len(target_embedding)}")
 
+        # Normalize the target once; each frame's faces are then scored with
+        # one matrix-vector product
+        target_norm = np.linalg.norm(target_embedding)
+        if target_norm == 0:
+            raise ValueError(f"Case {case_id} has a zero-vector face embedding")
+        target_unit = (target_embedding / target_norm).astype(np.float32)
+
         # ---- Ensure DeepFace is ready ----
         if not _ensure_deepface():
             raise RuntimeError("DeepFace is not available. Install with: pip install deepface")
@@ -326,14 +486,10 @@ def process_video(video_id: str):
         total_video_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
         duration_sec = total_video_frames / fps if fps > 0 else 0
 
-        # Calculate how many frames we'll extract (one every FRAME_INTERVAL_SECONDS)
-        extraction_times = []
-        t = 0.0
-        while t < duration_sec:
-            extraction_times.append(t)
-            t += FRAME_INTERVAL_SECONDS
-
-        total_frames_to_process = len(extraction_times)
+        # Keep one frame every FRAME_INTERVAL_SECONDS, i.e. every step-th frame
+        # of a sequential decode (no fps - no usable timeline, nothing to extract)
+        step = max(1, int(round(fps * FRAME_INTERVAL_SECONDS))) if fps > 0 else 0
+        total_frames_to_process = -(-total_video_frames // step) if step else 0
 
         logger.info(
             f"[VIDEO] Video info: fps={fps:.1f}, total_frames={total_video_frames}, "
@@ -349,109 +505,151 @@ def process_video(video_id: str):
         detections_buffer = []
         processed = 0
         detection_count = 0
+        # Signature of the last analyzed frame that had no detections, and
+        # the number of frames skipped as unchanged from it
+        unmatched_signature = None
+        skipped_static = 0
+        stopped_early = False
+
+        frames = queue.Queue(maxsize=FRAME_PREFETCH)
+        writes = queue.Queue(maxsize=WRITE_QUEUE_SIZE)
+        stop = threading.Event()
+        write_errors = []
+        reader = threading.Thread(
+            target=_read_frames, args=(cap, step, fps, frames, stop), name="video-reader", daemon=True
+        )
+        writer = threading.Thread(
+            target=_write_results, args=(video_id, writes, write_errors), name="video-writer", daemon=True
+        )
+        if step:
+            reader.start()
+        else:
+            frames.put(None)
+        writer.start()
 
-        for frame_idx, timestamp_sec in enumerate(extraction_times):
-            # Seek to the frame at the given timestamp
-            cap.set(cv2.CAP_PROP_POS_MSEC, timestamp_sec * 1000)
-            ret, frame_bgr = cap.read()
-
-            if not ret or frame_bgr is None:
-                processed += 1
-                continue
-
-            # Resize only if frame is larger than max (preserve quality for CCTV)
-            h_orig, w_orig = frame_bgr.shape[:2]
-            if w_orig > TARGET_MAX_WIDTH or h_orig > TARGET_MAX_HEIGHT:
-                scale = min(TARGET_MAX_WIDTH / w_orig, TARGET_MAX_HEIGHT / h_orig)
-                new_w = int(w_orig * scale)
-                new_h = int(h_orig * scale)
-                frame_bgr = cv2.resize(frame_bgr, (new_w, new_h))
-
-            # Convert BGR -> RGB for DeepFace
-            frame_rgb = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB)
-
-            # Detect faces and get embeddings
-            faces = _detect_and_embed(frame_rgb)
-
-            for embedding, facial_area in faces:
-                embedding_arr = np.array(embedding, dtype=np.float64)
-
-                # Skip if dimension mismatch
-                if len(embedding_arr) != len(target_embedding):
+        try:
+            while True:
+                item = frames.get()
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                if write_errors:
+                    raise write_errors[0]
+                frame_idx, timestamp_sec, frame_rgb, full_bgr = item
+
+                if frame_rgb is None:
+                    processed += 1
                     continue
 
-                distance = _cosine_distance(target_embedding, embedding_arr)
-                confidence = (1.0 - distance) * 100.0
-
-                logger.info(
-                    f"[VIDEO] Frame {frame_idx} (t={timestamp_sec:.1f}s): "
-                    f"face dist={distance:.4f}, conf={confidence:.1f}%"
-                )
-
-                if distance <= threshold:
-                    # We have a match!
-                    detection_id = str(uuid.uuid4())
-
-                    # Crop and save the face
-                    cropped = _crop_face(frame_rgb, facial_area)
-                    if cropped is not None and cropped.size > 0:
-                        cropped_path = _save_cropped_face(cropped, detection_id)
-                    else:
-                        # Save the full frame as fallback
-                        cropped_path = _save_cropped_face(frame_rgb, detection_id)
-
-                    detection = VideoDetections(
-                        id=detection_id,
-                        video_id=video_id,
-                        case_id=case_id,
-                        timestamp_seconds=round(timestamp_sec, 2),
-                        confidence=round(confidence, 2),
-                        cropped_face_path=cropped_path,
-                        frame_number=frame_idx,
-                    )
-                    detections_buffer.append(detection)
-                    detection_count += 1
+                # Static cameras see the same scene for minutes. If nothing in
+                # the picture changed since the last analyzed frame that had no
+                # detections, this one wouldn't have any either: skip DeepFace.
+                # Compared per cell, so a person entering any part of the frame
+                # still counts as a change; the reference isn't advanced on a
+                # skip, so slow drift can't accumulate unnoticed.
+                signature = _frame_signature(frame_rgb)
+                if (
+                    unmatched_signature is not None
+                    and np.abs(signature - unmatched_signature).max() < STATIC_FRAME_MAX_DIFF
+                ):
+                    skipped_static += 1
+                    faces = []
+                else:
+                    # Detect faces and get embeddings
+                    faces = _detect_and_embed(frame_rgb)
+                    unmatched_signature = signature
+
+                # Skip faces whose embedding dimension doesn't match the target
+                faces = [face for face in faces if len(face[0]) == len(target_unit)]
+                distances = []
+                if faces:
+                    # _detect_and_embed drops near-zero embeddings, so every norm is > 0
+                    embeddings = np.stack([embedding for embedding, _ in faces])
+                    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+                    distances = (1.0 - embeddings @ target_unit).tolist()
+
+                for (_, facial_area), distance in zip(faces, distances):
+                    confidence = (1.0 - distance) * 100.0
 
                     logger.info(
-                        f"[VIDEO] DETECTION at {timestamp_sec:.1f}s: "
-                        f"confidence={confidence:.1f}%, distance={distance:.4f}"
+                        f"[VIDEO] Frame {frame_idx} (t={timestamp_sec:.1f}s): "
+                        f"face dist={distance:.4f}, conf={confidence:.1f}%"
                     )
 
-            # Release frame memory
-            del frame_bgr, frame_rgb
+                    if distance <= threshold:
+                        # We have a match!
+                        unmatched_signature = None
+                        detection_id = uuid.uuid4().hex
+
+                        # Crop the face at source resolution (a frame thumbnail as
+                        # fallback); the writer saves it
+                        cropped = _crop_face(frame_rgb, facial_area, full_bgr=full_bgr)
+                        if cropped is None or cropped.size == 0:
+                            cropped = _frame_thumbnail(frame_rgb)
+                        writes.put(("crop", detection_id, cropped))
+
+                        detection = VideoDetections(
+                            id=detection_id,
+                            video_id=video_id,
+                            case_id=case_id,
+                            timestamp_seconds=round(timestamp_sec, 2),
+                            confidence=round(confidence, 2),
+                            cropped_face_path=_cropped_face_path(detection_id),
+                            frame_number=frame_idx,
+                        )
+                        detections_buffer.append(detection)
+                        detection_count += 1
+
+                        logger.info(
+                            f"[VIDEO] DETECTION at {timestamp_sec:.1f}s: "
+                            f"confidence={confidence:.1f}%, distance={distance:.4f}"
+                        )
+                        if (early_stop_distance is not None and distance <= early_stop_distance) or (
+                            max_detections and detection_count >= max_detections
+                        ):
+                            stopped_early = True
+
+                # Release frame memory
+                del frame_rgb, full_bgr
 
-            processed += 1
+                processed += 1
 
-            # Flush detections and update progress periodically
-            if processed % PROGRESS_UPDATE_INTERVAL == 0:
-                if detections_buffer:
-                    db_queries.save_video_detections_batch(detections_buffer)
+                # Flush detections and update progress periodically
+                if processed % PROGRESS_UPDATE_INTERVAL == 0:
+                    writes.put(("progress", detections_buffer, processed, detection_count))
                     detections_buffer = []
-                db_queries.update_video_status(
-                    video_id,
-                    status="processing",
-                    processed_frames=processed,
-                    total_detections=detection_count,
-                )
-                logger.info(f"[VIDEO] Progress: {processed}/{total_frames_to_process} frames, {detection_count} detections")
-
-        # ---- Flush remaining detections ----
-        if detections_buffer:
-            db_queries.save_video_detections_batch(detections_buffer)
-            detections_buffer = []
-
-        # ---- Mark as complete ----
-        db_queries.update_video_status(
+                    logger.info(f"[VIDEO] Progress: {processed}/{total_frames_to_process} frames, {detection_count} detections")
+
+                if stopped_early:
+                    logger.info(f"[VIDEO] Early stop at t={timestamp_sec:.1f}s after {detection_count} detections")
+                    break
+        finally:
+            # Stop the reader (if still decoding), let the writer finish its
+            # queue, and wait for both before the capture is released
+            stop.set()
+            writes.put(None)
+            writer.join()
+            if reader.is_alive():
+                reader.join()
+
+        if write_errors:
+            raise write_errors[0]
+
+        # ---- Flush remaining detections and mark as complete ----
+        db_queries.save_video_progress(
             video_id,
-            status="done",
+            detections_buffer,
             processed_frames=processed,
             total_detections=detection_count,
+            status="done",
             completed_at=datetime.utcnow(),
         )
+        detections_buffer = []
 
         logger.info(
             f"[VIDEO] ========== COMPLETE: video={video_id}, "
-            f"frames={processed}, detections={detection_count} =========="
+            f"frames={processed} ({skipped_static} unchanged, skipped), detections={detection_count} =========="
         )
 
     except Exception as e:
@@ -0,0 +1,95 @@
+"""
+Cached YAML config loader.
+
+Home.py and the auth router both read login_config.yml. Parsed configs are
+kept in a small LRU keyed by path and only re-parsed when the file's
+mtime or size changes, so repeat reads are a stat() + dict lookup.
+
+On a miss the parsed config is also written to a JSON sidecar
+(``<path>.cache.json``) so fresh processes (each Streamlit session host,
+each uvicorn worker) can skip PyYAML entirely. The sidecar is trusted only
+while it records the same mtime/size and ``# config-version:`` header as
+the YAML file; bump the header to force a re-parse.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+import orjson
+import yaml
+from yaml import SafeLoader
+
+MAX_CACHED_FILES = 100
+SIDECAR_SUFFIX = ".cache.json"
+VERSION_HEADER = "# config-version:"
+
+# abspath -> ((st_mtime_ns, st_size), parsed_config)
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+
+def _read_version(path: str) -> str:
+    """Return the value of the '# config-version:' header on the first line, if any."""
+    with open(path) as file:
+        first_line = file.readline()
+    if first_line.startswith(VERSION_HEADER):
+        return first_line[len(VERSION_HEADER):].strip()
+    return ""
+
+
+def _load_sidecar(sidecar_path: str, stamp, version: str):
+    """Return the config stored in the JSON sidecar, or None if it is missing or stale."""
+    try:
+        with open(sidecar_path, "rb") as file:
+            payload = orjson.loads(file.read())
+    except (OSError, orjson.JSONDecodeError):
+        return None
+    if payload.get("stamp") != list(stamp) or payload.get("version") != version:
+        return None
+    return payload.get("config")
+
+
+def _write_sidecar(sidecar_path: str, stamp, version: str, parsed):
+    """Best-effort write of the JSON sidecar (skipped on read-only dirs / non-JSON values)."""
+    try:
+        data = orjson.dumps({"stamp": list(stamp), "version": version, "config": parsed})
+        tmp_path = f"{sidecar_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as file:
+            file.write(data)
+        os.replace(tmp_path, sidecar_path)
+    except (OSError, TypeError):
+        pass
+
+
+def load_yaml(path: str):
+    """
+    Return the parsed contents of a YAML file.
+
+    The returned object is shared between callers - do not mutate it
+    (deepcopy first if you need to). Raises FileNotFoundError like open().
+    """
+    key = os.path.abspath(path)
+    st = os.stat(key)
+    stamp = (st.st_mtime_ns, st.st_size)
+
+    with _lock:
+        entry = _cache.get(key)
+        if entry is not None and entry[0] == stamp:
+            _cache.move_to_end(key)
+            return entry[1]
+
+    sidecar_path = key + SIDECAR_SUFFIX
+    version = _read_version(key)
+    parsed = _load_sidecar(sidecar_path, stamp, version)
+    if parsed is None:
+        with open(key) as file:
+            parsed = yaml.load(file, Loader=SafeLoader)
+        _write_sidecar(sidecar_path, stamp, version, parsed)
+
+    with _lock:
+        _cache[key] = (stamp, parsed)
+        _cache.move_to_end(key)
+        if len(_cache) > MAX_CACHED_FILES:
+            _cache.popitem(last=False)
+    return parsed
@@ -1,103 +1,99 @@
 
+import base64
 import time
 import json
-import urllib.request
+import http.client
+import threading
 import urllib.parse
 import concurrent.futures
 import sys
 
 BASE_URL = "http://localhost:8000/api/v1"
 
+# One keep-alive connection per worker thread instead of a new TCP connection
+# per request (http.client connections aren't safe to share across threads)
+_local = threading.local()
+
+def get_connection():
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        parsed = urllib.parse.urlsplit(BASE_URL)
+        conn_class = http.client.HTTPSConnection if parsed.scheme == "https" else http.client.HTTPConnection
+        conn = _local.conn = conn_class(parsed.netloc, timeout=120)
+    return conn
+
+def send(method, url, body=None, headers=None):
+    """Send over the thread's pooled connection, reconnecting once if the server closed it."""
+    parsed = urllib.parse.urlsplit(url)
+    path = parsed.path + (f"?{parsed.query}" if parsed.query else "")
+    for attempt in range(2):
+        conn = get_connection()
+        try:
+            conn.request(method, path, body=body, headers=headers or {})
+            response = conn.getresponse()
+            return response.status, response.read()
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+            conn.close()
+            _local.conn = None
+            if attempt:
+                raise
+
 def make_request(method, url, data=None, files=None):
     # Basic multipart/form-data implementation for file upload
     if files:
         boundary = '----WebKitFormBoundary7MA4YWxkTrZu0gW'
-        body = []
-        
-        # Add fields
-        if data:
-            for key, value in data.items():
-                body.append(f'--{boundary}')
-                body.append(f'Content-Disposition: form-data; name="{key}"')
-                body.append('')
-                body.append(str(value))
-        
-        # Add files
-        for key, (filename, filedata, content_type) in files.items():
-            body.append(f'--{boundary}')
-            body.append(f'Content-Disposition: form-data; name="{key}"; filename="{filename}"')
-            body.append(f'Content-Type: {content_type}')
-            body.append('')
-            # filedata is bytes
-            pass # We handle bytes concatenation later
-            
-        body.append(f'--{boundary}--')
-        body.append('')
-        
-        # Construct full body
-        full_body = b''
-        
-        # Add fields
-        if data:
-            for key, value in data.items():
-                full_body += f'--{boundary}\r\n'.encode()
-                full_body += f'Content-Disposition: form-data; name="{key}"\r\n\r\n'.encode()
-                full_body += f'{value}\r\n'.encode()
-                
+        # Collect the pieces and join once; += on bytes recopies the whole
+        # body (photo included) for every part
+        parts = []
+        for key, value in (data or {}).items():
+            parts.append(
+                f'--{boundary}\r\nContent-Disposition: form-data; name="{key}"\r\n\r\n{value}\r\n'.encode()
+            )
         for key, (filename, filedata, content_type) in files.items():
-             full_body += f'--{boundary}\r\n'.encode()
-             full_body += f'Content-Disposition: form-data; name="{key}"; filename="{filename}"\r\n'.encode()
-             full_body += f'Content-Type: {content_type}\r\n\r\n'.encode()
-             full_body += filedata
-             full_body += b'\r\n'
-             
-        full_body += f'--{boundary}--\r\n'.encode()
-        
-        req = urllib.request.Request(url, data=full_body, method=method)
-        req.add_header('Content-Type', f'multipart/form-data; boundary={boundary}')
+            parts.append(
+                f'--{boundary}\r\nContent-Disposition: form-data; name="{key}"; filename="{filename}"\r\n'
+                f'Content-Type: {content_type}\r\n\r\n'.encode()
+            )
+            parts.append(filedata)
+            parts.append(b'\r\n')
+        parts.append(f'--{boundary}--\r\n'.encode())
+
+        body, headers = b''.join(parts), {'Content-Type': f'multipart/form-data; boundary={boundary}'}
     else:
         if data:
-            json_data = json.dumps(data).encode('utf-8')
-            req = urllib.request.Request(url, data=json_data, method=method)
-            req.add_header('Content-Type', 'application/json')
+            body, headers = json.dumps(data).encode('utf-8'), {'Content-Type': 'application/json'}
         else:
-            req = urllib.request.Request(url, method=method)
+            body, headers = None, {}
             
     try:
-        with urllib.request.urlopen(req) as response:
-            return {
-                'status_code': response.status,
-                'json': json.loads(response.read().decode())
-            }
-    except urllib.error.HTTPError as e:
-        return {
-            'status_code': e.code,
-            'json': json.loads(e.read().decode()) if e.code != 404 else {'detail': 'Not Found'}
-        }
+        status, payload = send(method, url, body, headers)
+        if status == 404:
+            return {'status_code': status, 'json': {'detail': 'Not Found'}}
+        return {'status_code': status, 'json': json.loads(payload.decode())}
     except Exception as e:
         return {'status_code': 0, 'error': str(e)}
 
+# 1x1 red and blue test photos, encoded once (the server decodes JPEG faster than BMP)
+RED_JPEG = base64.b64decode(
+    "/9j/4AAQSkZJRgABAQAAAQABAAD/2wBDAAIBAQEBAQIBAQECAgICAgQDAgICAgUEBAMEBgUGBgYFBgYGBwkIBgcJBwYGCAsICQoKCgoKBggLDAsKDAkKCgr/"
+    "2wBDAQICAgICAgUDAwUKBwYHCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgr/wAARCAABAAEDASIAAhEBAxEB/8QAFQAB"
+    "AQAAAAAAAAAAAAAAAAAAAAj/xAAUEAEAAAAAAAAAAAAAAAAAAAAA/8QAFQEBAQAAAAAAAAAAAAAAAAAACAn/xAAUEQEAAAAAAAAAAAAAAAAAAAAA/9oADAMBAAIR"
+    "AxEAPwCLwBTX8f/Z"
+)
+BLUE_JPEG = base64.b64decode(
+    "/9j/4AAQSkZJRgABAQAAAQABAAD/2wBDAAIBAQEBAQIBAQECAgICAgQDAgICAgUEBAMEBgUGBgYFBgYGBwkIBgcJBwYGCAsICQoKCgoKBggLDAsKDAkKCgr/"
+    "2wBDAQICAgICAgUDAwUKBwYHCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgr/wAARCAABAAEDASIAAhEBAxEB/8QAFQAB"
+    "AQAAAAAAAAAAAAAAAAAAAAn/xAAUEAEAAAAAAAAAAAAAAAAAAAAA/8QAFQEBAQAAAAAAAAAAAAAAAAAABwn/xAAUEQEAAAAAAAAAAAAAAAAAAAAA/9oADAMBAAIR"
+    "AxEAPwCOYC/grf/Z"
+)
+
 def create_image(color):
-    # Simple BMP image generation
-    # BMP header (14 bytes) + DIB header (40 bytes) + Pixel Data
-    # 1x1 pixel 24-bit
-    bmp = (
-        b'BM\x3a\x00\x00\x00\x00\x00\x00\x00\x36\x00\x00\x00' + # Header
-        b'\x28\x00\x00\x00\x01\x00\x00\x00\x01\x00\x00\x00\x01\x00\x18\x00' + # DIB
-        b'\x00\x00\x00\x00\x04\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00' +
-        b'\x00\x00\x00\x00\x00\x00\x00\x00'
-    )
-    if color == 'red':
-        pixel = b'\x00\x00\xFF' # BGR
-    else:
-        pixel = b'\xFF\x00\x00' # BGR
-    
-    return bmp + pixel + b'\x00' # Padding to 4 bytes
+    return RED_JPEG if color == 'red' else BLUE_JPEG
 
 def register_case(name="Test Case"):
     img_data = create_image('red')
     
-    files = {'photo': ('test.bmp', img_data, 'image/bmp')}
+    files = {'photo': ('test.jpg', img_data, 'image/jpeg')}
     data = {
         'name': name,
         'age': '25',
@@ -114,7 +110,7 @@ def register_case(name="Test Case"):
 def submit_sighting(location="Mumbai"):
     img_data = create_image('blue')
     
-    files = {'photo': ('sighting.bmp', img_data, 'image/bmp')}
+    files = {'photo': ('sighting.jpg', img_data, 'image/jpeg')}
     data = {
         'location': location,
         'mobile': '1234567890'
@@ -128,7 +124,7 @@ def submit_sighting(location="Mumbai"):
 
 def run_matching():
     start = time.time()
-    # Query params need to be handled manually in URL for urllib
+    # Query params need to be handled manually in the URL
     response = make_request('POST', f"{BASE_URL}/matching/run?tolerance=0.6")
     end = time.time()
     print(f"Matching Status: {response.get('status_code')}, Time: {end - start:.2f}s")
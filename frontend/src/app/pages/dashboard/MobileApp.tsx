@@ -1,6 +1,6 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { Smartphone, Upload, MapPin, Send, Search, CheckCircle, Clock, X, Eye, User, Loader2, AlertCircle } from 'lucide-react';
-import { getCases, submitSighting, type Case } from '@/app/services/api';
+import { getCases, getSubmissionStatus, submitSighting, type Case } from '@/app/services/api';
 
 const API_BASE = 'http://localhost:8000';
 
@@ -11,6 +11,9 @@ export default function MobileApp() {
   const [sightingDescription, setSightingDescription] = useState('');
   const [showSuccess, setShowSuccess] = useState(false);
   const [referenceId, setReferenceId] = useState('');
+  // Face check runs after the upload is accepted: 'queued' until it settles
+  const [submissionStatus, setSubmissionStatus] = useState<string | null>(null);
+  const pollRef = useRef<number | null>(null);
   const [photoFile, setPhotoFile] = useState<File | null>(null);
   const [isSubmitting, setIsSubmitting] = useState(false);
   const [submitError, setSubmitError] = useState<string | null>(null);
@@ -41,6 +44,40 @@ export default function MobileApp() {
     fetchCases();
   }, []);
 
+  // ---- Cleanup polling on unmount ----
+  useEffect(() => {
+    return () => {
+      if (pollRef.current) clearInterval(pollRef.current);
+    };
+  }, []);
+
+  // ---- Poll the submission until the face check finishes ----
+  const startPolling = (id: string) => {
+    if (pollRef.current) clearInterval(pollRef.current);
+
+    const poll = async () => {
+      try {
+        const s = await getSubmissionStatus(id);
+        setSubmissionStatus(s.status);
+        if (s.status !== 'queued' && pollRef.current) {
+          clearInterval(pollRef.current);
+          pollRef.current = null;
+        }
+      } catch (err) {
+        console.error('Status poll failed:', err);
+      }
+    };
+
+    pollRef.current = window.setInterval(poll, 2000);
+  };
+
+  const resetSubmission = () => {
+    if (pollRef.current) clearInterval(pollRef.current);
+    pollRef.current = null;
+    setSubmissionStatus(null);
+    setShowSuccess(false);
+  };
+
   const handlePhotoUpload = (e: React.ChangeEvent<HTMLInputElement>) => {
     const file = e.target.files?.[0];
     if (file) {
@@ -69,7 +106,9 @@ export default function MobileApp() {
       formData.append('email', '');
 
       const result = await submitSighting(formData);
-      setReferenceId(result.id);
+      setReferenceId(result.public_ref ?? result.id);
+      setSubmissionStatus(result.status);
+      if (result.status === 'queued') startPolling(result.id);
       setShowSuccess(true);
       setSightingPhoto(null);
       setPhotoFile(null);
@@ -214,7 +253,39 @@ export default function MobileApp() {
                 <p className="text-gray-600">Help reunite families by reporting sightings of missing persons</p>
               </div>
 
-              {showSuccess ? (
+              {showSuccess && submissionStatus === 'queued' ? (
+                <div className="text-center py-8">
+                  <Loader2 className="h-12 w-12 mx-auto mb-6 animate-spin" style={{ color: '#1e1b4b' }} />
+                  <h3 className="text-2xl font-bold mb-2" style={{ color: '#1e1b4b' }}>Checking Your Photo...</h3>
+                  <p className="text-gray-600 mb-2">
+                    Your submission reference ID is: <span className="font-mono font-bold">{referenceId}</span>
+                  </p>
+                  <p className="text-gray-600">
+                    Your sighting was received. We're checking that the photo shows a clear face - this usually takes a few seconds.
+                  </p>
+                </div>
+              ) : showSuccess && (submissionStatus === 'rejected' || submissionStatus === 'failed') ? (
+                <div className="text-center py-8">
+                  <div className="w-20 h-20 rounded-full mx-auto mb-6 flex items-center justify-center bg-red-500">
+                    <AlertCircle className="h-12 w-12 text-white" />
+                  </div>
+                  <h3 className="text-2xl font-bold mb-2" style={{ color: '#1e1b4b' }}>
+                    {submissionStatus === 'rejected' ? 'No Face Detected' : 'Submission Failed'}
+                  </h3>
+                  <p className="text-gray-600 mb-6">
+                    {submissionStatus === 'rejected'
+                      ? 'No face was detected in the photo. Please submit a clear photo of the person\'s face.'
+                      : 'Something went wrong while saving your sighting. Please submit it again.'}
+                  </p>
+                  <button
+                    onClick={resetSubmission}
+                    className="px-8 py-3 rounded-lg text-white font-medium transition-all hover:shadow-lg"
+                    style={{ backgroundColor: '#1e1b4b' }}
+                  >
+                    Try Again
+                  </button>
+                </div>
+              ) : showSuccess ? (
                 <div className="text-center py-8">
                   <div className="w-20 h-20 rounded-full mx-auto mb-6 flex items-center justify-center" style={{ backgroundColor: '#10b981' }}>
                     <CheckCircle className="h-12 w-12 text-white" />
@@ -227,7 +298,7 @@ export default function MobileApp() {
                     Save this ID to track the status of your sighting. Our AI will analyze the photo for potential matches.
                   </p>
                   <button
-                    onClick={() => setShowSuccess(false)}
+                    onClick={resetSubmission}
                     className="px-8 py-3 rounded-lg text-white font-medium transition-all hover:shadow-lg"
                     style={{ backgroundColor: '#1e1b4b' }}
                   >
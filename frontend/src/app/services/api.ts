@@ -158,6 +158,7 @@ export async function deleteCase(caseId: string): Promise<{ status: string; id:
 
 export interface PublicSubmission {
     id: string;
+    public_ref?: string;
     status: string;
     location?: string;
     mobile?: string;
@@ -176,6 +177,11 @@ export async function getPublicSubmission(id: string): Promise<PublicSubmission>
     return apiRequest<PublicSubmission>(`/public/${id}`);
 }
 
+export async function getSubmissionStatus(id: string): Promise<{ id: string; public_ref?: string; status: string }> {
+    // no-cache: always revalidate (the ETag makes an unchanged status a cheap 304)
+    return apiRequest(`/public/${id}/status`, { cache: 'no-cache' });
+}
+
 export async function deletePublicSubmission(id: string): Promise<{ status: string; id: string }> {
     return apiRequest(`/public/${id}`, { method: 'DELETE' });
 }